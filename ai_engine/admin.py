@@ -1,40 +1,73 @@
 from django.contrib import admin
-from .models import AIModel, AIPrediction, AIAnalysisSession, AILearningData, AIInsight
+from .models import AIModel, AIPrediction, AIAnalysisSession, AILearningData, AIInsight, JSONArrayLength
+
+
+class ChangelistColumnsMixin:
+    """Load only the columns the changelist displays, skipping JSON/text blobs"""
+    changelist_only = []
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        if self.changelist_only and match and match.url_name.endswith('_changelist'):
+            queryset = queryset.only(*self.changelist_only)
+        return queryset
 
 
 @admin.register(AIModel)
 class AIModelAdmin(admin.ModelAdmin):
     list_display = ['name', 'model_type', 'version', 'accuracy', 'is_active', 'last_trained']
+    list_per_page = 50
+    show_full_result_count = False
     list_filter = ['model_type', 'is_active', 'last_trained']
     search_fields = ['name', 'description']
 
 
 @admin.register(AIPrediction)
-class AIPredictionAdmin(admin.ModelAdmin):
+class AIPredictionAdmin(ChangelistColumnsMixin, admin.ModelAdmin):
     list_display = ['model', 'prediction_type', 'confidence_score', 'is_validated', 'created_at']
-    list_filter = ['model', 'prediction_type', 'confidence_level', 'is_validated']
+    list_per_page = 50
+    show_full_result_count = False
+    list_filter = ['model', 'prediction_type', 'confidence_level', 'is_validated', 'created_at']
+    list_select_related = ['model']
+    autocomplete_fields = ['model']
     search_fields = ['recommendation', 'reasoning']
-    date_hierarchy = 'created_at'
+    changelist_only = ['id', 'model', 'prediction_type', 'confidence_score', 'is_validated', 'created_at',
+                       'model__name', 'model__version', 'model__model_type']
 
 
 @admin.register(AIAnalysisSession)
-class AIAnalysisSessionAdmin(admin.ModelAdmin):
-    list_display = ['session_id', 'session_type', 'status', 'predictions_generated', 'started_at', 'completed_at']
+class AIAnalysisSessionAdmin(ChangelistColumnsMixin, admin.ModelAdmin):
+    list_display = ['session_id', 'session_type', 'status', 'predictions_generated', 'alerts_count',
+                    'started_at', 'completed_at']
+    list_per_page = 50
+    show_full_result_count = False
     list_filter = ['session_type', 'status', 'started_at']
     search_fields = ['session_id']
-    date_hierarchy = 'started_at'
+    changelist_only = ['id', 'session_id', 'session_type', 'status', 'predictions_generated', 'started_at', 'completed_at']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(alerts_count=JSONArrayLength('critical_alerts'))
+
+    @admin.display(description='Critical alerts', ordering='alerts_count')
+    def alerts_count(self, obj):
+        return obj.alerts_count
 
 
 @admin.register(AILearningData)
-class AILearningDataAdmin(admin.ModelAdmin):
+class AILearningDataAdmin(ChangelistColumnsMixin, admin.ModelAdmin):
     list_display = ['source_type', 'quality_score', 'is_validated', 'used_for_training', 'created_at']
-    list_filter = ['source_type', 'is_validated', 'used_for_training', 'is_anomaly']
-    date_hierarchy = 'created_at'
+    list_per_page = 50
+    show_full_result_count = False
+    list_filter = ['source_type', 'is_validated', 'used_for_training', 'is_anomaly', 'created_at']
+    changelist_only = ['id', 'source_type', 'quality_score', 'is_validated', 'used_for_training', 'created_at']
 
 
 @admin.register(AIInsight)
-class AIInsightAdmin(admin.ModelAdmin):
+class AIInsightAdmin(ChangelistColumnsMixin, admin.ModelAdmin):
     list_display = ['title', 'insight_type', 'importance_level', 'confidence_level', 'is_implemented', 'created_at']
-    list_filter = ['insight_type', 'importance_level', 'is_implemented']
+    list_per_page = 50
+    show_full_result_count = False
+    list_filter = ['insight_type', 'importance_level', 'is_implemented', 'created_at']
     search_fields = ['title', 'description']
-    date_hierarchy = 'created_at'
\ No newline at end of file
+    changelist_only = ['id', 'title', 'insight_type', 'importance_level', 'confidence_level', 'is_implemented', 'created_at']
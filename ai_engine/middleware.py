@@ -0,0 +1,16 @@
+from django.utils import timezone
+
+from .predictors import _request_timestamp
+
+
+def request_timestamp_middleware(get_response):
+    """Pin one prediction timestamp per request so every predictor reports the same time"""
+
+    def middleware(request):
+        token = _request_timestamp.set(timezone.now().isoformat())
+        try:
+            return get_response(request)
+        finally:
+            _request_timestamp.reset(token)
+
+    return middleware
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-15 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aianalysissession',
+            index=models.Index(fields=['started_at'], name='ai_engine_a_started_7d4cc3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aiinsight',
+            index=models.Index(fields=['created_at'], name='ai_engine_a_created_32e35c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ailearningdata',
+            index=models.Index(fields=['created_at'], name='ai_engine_a_created_28baac_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aiprediction',
+            index=models.Index(fields=['created_at'], name='ai_engine_a_created_ec9c64_idx'),
+        ),
+    ]
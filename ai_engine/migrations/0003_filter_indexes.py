@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-15 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0002_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aianalysissession',
+            name='session_type',
+            field=models.CharField(choices=[('routine', 'Muntazam Tahlil'), ('triggered', 'Avtomatik Ishga Tushgan'), ('manual', "Qo'lda Boshlangan"), ('emergency', 'Favqulodda')], db_index=True, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='aianalysissession',
+            name='status',
+            field=models.CharField(choices=[('running', 'Davom etmoqda'), ('completed', 'Yakunlangan'), ('failed', 'Muvaffaqiyatsiz'), ('cancelled', 'Bekor qilingan')], db_index=True, default='running', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='aiinsight',
+            name='importance_level',
+            field=models.CharField(choices=[('low', 'Past'), ('medium', "O'rtacha"), ('high', 'Yuqori'), ('critical', 'Kritik')], db_index=True, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='aiinsight',
+            name='insight_type',
+            field=models.CharField(choices=[('pattern_discovery', 'Naqsh Kashfiyoti'), ('optimization_opportunity', 'Optimizatsiya Imkoniyati'), ('risk_assessment', 'Xavf Baholash'), ('trend_analysis', 'Trend Tahlili'), ('correlation_finding', 'Korrelyatsiya Topish')], db_index=True, max_length=30),
+        ),
+        migrations.AlterField(
+            model_name='ailearningdata',
+            name='source_type',
+            field=models.CharField(choices=[('sensors', 'Datchiklar'), ('weather', 'Ob-havo'), ('irrigation', "Sug'orish"), ('plant_growth', "O'simlik O'sishi"), ('user_feedback', 'Foydalanuvchi Fikri')], db_index=True, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='aiprediction',
+            name='confidence_level',
+            field=models.CharField(choices=[('very_low', 'Juda Past'), ('low', 'Past'), ('medium', "O'rtacha"), ('high', 'Yuqori'), ('very_high', 'Juda Yuqori')], db_index=True, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='aiprediction',
+            name='prediction_type',
+            field=models.CharField(choices=[('irrigation_need', "Sug'orish Zaruriyati"), ('optimal_timing', 'Optimal Vaqt'), ('water_amount', 'Suv Miqdori'), ('plant_health_risk', "O'simlik Sog'ligi Xavfi"), ('weather_impact', "Ob-havo Ta'siri"), ('pest_detection', 'Zararkunanda Aniqlash')], db_index=True, max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='aiprediction',
+            index=models.Index(fields=['model', 'created_at'], name='ai_engine_a_model_i_4b9b3a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aiprediction',
+            index=models.Index(fields=['prediction_type', 'created_at'], name='ai_engine_a_predict_b14bea_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-15 22:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0003_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aiinsight',
+            index=models.Index(condition=models.Q(('is_implemented', False)), fields=['created_at'], name='aiinsight_pending'),
+        ),
+        migrations.AddIndex(
+            model_name='ailearningdata',
+            index=models.Index(condition=models.Q(('used_for_training', False)), fields=['created_at'], name='aild_untrained'),
+        ),
+        migrations.AddIndex(
+            model_name='ailearningdata',
+            index=models.Index(condition=models.Q(('is_anomaly', True)), fields=['created_at'], name='aild_anomaly'),
+        ),
+        migrations.AddIndex(
+            model_name='aimodel',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['is_active'], name='aimodel_active_partial'),
+        ),
+        migrations.AddIndex(
+            model_name='aiprediction',
+            index=models.Index(condition=models.Q(('is_validated', False)), fields=['created_at'], name='aipred_unvalidated'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-15 22:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0004_boolean_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='aianalysissession',
+            options={'ordering': ['-started_at']},
+        ),
+        migrations.AlterModelOptions(
+            name='aiinsight',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AlterModelOptions(
+            name='ailearningdata',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AlterModelOptions(
+            name='aiprediction',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.RemoveIndex(
+            model_name='aianalysissession',
+            name='ai_engine_a_started_7d4cc3_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='aiinsight',
+            name='ai_engine_a_created_32e35c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='ailearningdata',
+            name='ai_engine_a_created_28baac_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='aiprediction',
+            name='ai_engine_a_created_ec9c64_idx',
+        ),
+        migrations.AddIndex(
+            model_name='aianalysissession',
+            index=models.Index(fields=['-started_at'], name='aisession_started_desc'),
+        ),
+        migrations.AddIndex(
+            model_name='aiinsight',
+            index=models.Index(fields=['-created_at'], name='aiinsight_created_desc'),
+        ),
+        migrations.AddIndex(
+            model_name='ailearningdata',
+            index=models.Index(fields=['-created_at'], name='ailearningdata_created_desc'),
+        ),
+        migrations.AddIndex(
+            model_name='aiprediction',
+            index=models.Index(fields=['-created_at'], name='aiprediction_created_desc'),
+        ),
+    ]
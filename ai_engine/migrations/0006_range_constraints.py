@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-15 22:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0005_created_desc_ordering'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='aiinsight',
+            constraint=models.CheckConstraint(check=models.Q(('outcome_rating__isnull', True), models.Q(('outcome_rating__gte', 1), ('outcome_rating__lte', 5)), _connector='OR'), name='aiinsight_outcome_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='ailearningdata',
+            constraint=models.CheckConstraint(check=models.Q(('quality_score__gte', 0), ('quality_score__lte', 1)), name='aild_quality_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='aimodel',
+            constraint=models.CheckConstraint(check=models.Q(('accuracy__gte', 0), ('accuracy__lte', 100)), name='aimodel_accuracy_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='aiprediction',
+            constraint=models.CheckConstraint(check=models.Q(('confidence_score__gte', 0), ('confidence_score__lte', 100)), name='aipred_confidence_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='aiprediction',
+            constraint=models.CheckConstraint(check=models.Q(('feedback_score__isnull', True), models.Q(('feedback_score__gte', 1), ('feedback_score__lte', 5)), _connector='OR'), name='aipred_feedback_range'),
+        ),
+    ]
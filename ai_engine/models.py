@@ -1,16 +1,77 @@
 from django.db import models
+from django.db.models import Case, ExpressionWrapper, F, Q, Value, When, Window
+from django.db.models.functions import Abs, Coalesce, NullIf, RowNumber
 from django.utils import timezone
-import json
+
+BULK_BATCH_SIZE = 1000
+
+
+class JSONArrayLength(models.Func):
+    """Length of a JSON array column, computed by the database"""
+    function = 'JSON_ARRAY_LENGTH'
+    output_field = models.IntegerField()
+    
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function='JSONB_ARRAY_LENGTH', **extra_context)
+
+
+class BulkIngestManager(models.Manager):
+    """Manager with batched write helpers for high-volume AI tables"""
+    
+    def ingest(self, rows, batch_size=BULK_BATCH_SIZE):
+        """Insert many rows (dicts of field values) in batched INSERTs"""
+        return self.bulk_create([self.model(**row) for row in rows], batch_size=batch_size)
+    
+    def bulk_save(self, objs, fields, batch_size=BULK_BATCH_SIZE):
+        """Write changed fields of many instances in batched UPDATEs"""
+        return self.bulk_update(objs, fields, batch_size=batch_size)
+
+
+class AIPredictionManager(BulkIngestManager):
+    """Manager with canonical read paths for AI predictions"""
+    
+    def recent_with_model(self, limit=100):
+        """Latest predictions with their AI model joined in the same query"""
+        return self.select_related('model').only(
+            'id', 'prediction_type', 'prediction_value', 'confidence_score', 'confidence_level',
+            'recommendation', 'created_at', 'model__name', 'model__version', 'model__model_type'
+        ).order_by('-created_at')[:limit]
+    
+    def recent_stats_by_model(self, ai_models, limit=100, sample=10):
+        """
+        {model id: (count of its latest `limit` predictions, mean confidence of the latest `sample`)}
+        
+        One query: predictions are ranked per model with ROW_NUMBER() and only
+        the top `limit` rows per model are read.
+        """
+        ranked = self.filter(model__in=ai_models).annotate(
+            recency=Window(RowNumber(), partition_by=F('model_id'), order_by=F('created_at').desc())
+        ).filter(recency__lte=limit).values_list('model_id', 'recency', 'confidence_score')
+        
+        counts, confidence_totals = {}, {}
+        for model_id, recency, confidence_score in ranked:
+            counts[model_id] = counts.get(model_id, 0) + 1
+            if recency <= sample:
+                confidence_totals[model_id] = confidence_totals.get(model_id, 0) + confidence_score
+        return {
+            model_id: (count, confidence_totals.get(model_id, 0) / min(count, sample))
+            for model_id, count in counts.items()
+        }
+
+
+MODEL_TYPES = (
+    ('irrigation_predictor', 'Sug\'orish Bashoratchi'),
+    ('plant_health', 'O\'simlik Sog\'ligi'),
+    ('weather_analyzer', 'Ob-havo Tahlilchi'),
+    ('water_optimizer', 'Suv Optimizatori'),
+)
+MODEL_TYPE_LABELS = dict(MODEL_TYPES)
 
 
 class AIModel(models.Model):
     """Model for AI model metadata"""
-    MODEL_TYPES = [
-        ('irrigation_predictor', 'Sug\'orish Bashoratchi'),
-        ('plant_health', 'O\'simlik Sog\'ligi'),
-        ('weather_analyzer', 'Ob-havo Tahlilchi'),
-        ('water_optimizer', 'Suv Optimizatori'),
-    ]
+    MODEL_TYPES = MODEL_TYPES
+    MODEL_TYPE_LABELS = MODEL_TYPE_LABELS
     
     name = models.CharField(max_length=100)
     model_type = models.CharField(max_length=30, choices=MODEL_TYPES)
@@ -31,31 +92,48 @@ class AIModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active'], condition=Q(is_active=True), name='aimodel_active_partial'),
+        ]
+        constraints = [
+            models.CheckConstraint(check=Q(accuracy__gte=0) & Q(accuracy__lte=100), name='aimodel_accuracy_range'),
+        ]
+    
     def __str__(self):
-        return f"{self.name} v{self.version} - {self.get_model_type_display()}"
+        return f"{self.name} v{self.version} - {self.MODEL_TYPE_LABELS.get(self.model_type, self.model_type)}"
+
+
+PREDICTION_TYPES = (
+    ('irrigation_need', 'Sug\'orish Zaruriyati'),
+    ('optimal_timing', 'Optimal Vaqt'),
+    ('water_amount', 'Suv Miqdori'),
+    ('plant_health_risk', 'O\'simlik Sog\'ligi Xavfi'),
+    ('weather_impact', 'Ob-havo Ta\'siri'),
+    ('pest_detection', 'Zararkunanda Aniqlash'),
+)
+
+CONFIDENCE_LEVELS = (
+    ('very_low', 'Juda Past'),
+    ('low', 'Past'),
+    ('medium', 'O\'rtacha'),
+    ('high', 'Yuqori'),
+    ('very_high', 'Juda Yuqori'),
+)
+PREDICTION_TYPE_LABELS = dict(PREDICTION_TYPES)
 
 
 class AIPrediction(models.Model):
     """Model for AI predictions and recommendations"""
-    PREDICTION_TYPES = [
-        ('irrigation_need', 'Sug\'orish Zaruriyati'),
-        ('optimal_timing', 'Optimal Vaqt'),
-        ('water_amount', 'Suv Miqdori'),
-        ('plant_health_risk', 'O\'simlik Sog\'ligi Xavfi'),
-        ('weather_impact', 'Ob-havo Ta\'siri'),
-        ('pest_detection', 'Zararkunanda Aniqlash'),
-    ]
-    
-    CONFIDENCE_LEVELS = [
-        ('very_low', 'Juda Past'),
-        ('low', 'Past'),
-        ('medium', 'O\'rtacha'),
-        ('high', 'Yuqori'),
-        ('very_high', 'Juda Yuqori'),
-    ]
+    PREDICTION_TYPES = PREDICTION_TYPES
+    PREDICTION_TYPE_LABELS = PREDICTION_TYPE_LABELS
+    CONFIDENCE_LEVELS = CONFIDENCE_LEVELS
+    
+    ACCURACY_ERROR_MARGIN = 0.15  # 15% error margin
     
+    # Cascades as one bulk DELETE while AIPrediction has no delete signals or reverse relations
     model = models.ForeignKey(AIModel, on_delete=models.CASCADE)
-    prediction_type = models.CharField(max_length=30, choices=PREDICTION_TYPES)
+    prediction_type = models.CharField(max_length=30, choices=PREDICTION_TYPES, db_index=True)
     
     # Input data (stored as JSON)
     input_data = models.JSONField()
@@ -63,7 +141,7 @@ class AIPrediction(models.Model):
     # Prediction results
     prediction_value = models.FloatField()  # Main prediction value
     confidence_score = models.FloatField()  # 0-100%
-    confidence_level = models.CharField(max_length=20, choices=CONFIDENCE_LEVELS)
+    confidence_level = models.CharField(max_length=20, choices=CONFIDENCE_LEVELS, db_index=True)
     
     # Additional prediction details
     recommendation = models.TextField()
@@ -77,37 +155,87 @@ class AIPrediction(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = AIPredictionManager()
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='aiprediction_created_desc'),
+            models.Index(fields=['model', 'created_at']),
+            models.Index(fields=['prediction_type', 'created_at']),
+            models.Index(fields=['created_at'], condition=Q(is_validated=False), name='aipred_unvalidated'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=Q(confidence_score__gte=0) & Q(confidence_score__lte=100),
+                name='aipred_confidence_range'
+            ),
+            models.CheckConstraint(
+                check=Q(feedback_score__isnull=True) | Q(feedback_score__gte=1, feedback_score__lte=5),
+                name='aipred_feedback_range'
+            ),
+        ]
+    
     def __str__(self):
-        return f"{self.get_prediction_type_display()} - {self.confidence_score:.1f}% confidence"
+        return f"{self.PREDICTION_TYPE_LABELS.get(self.prediction_type, self.prediction_type)} - {self.confidence_score:.1f}% confidence"
     
     @property
     def is_accurate(self):
         """Check if prediction was accurate (if actual outcome is available)"""
         if self.actual_outcome is not None:
+            if self.prediction_value == 0:
+                return self.actual_outcome == 0
             error_margin = abs(self.prediction_value - self.actual_outcome) / self.prediction_value
-            return error_margin <= 0.15  # 15% error margin
+            return error_margin <= self.ACCURACY_ERROR_MARGIN
         return None
+    
+    @classmethod
+    def annotate_accuracy(cls, queryset=None):
+        """Annotate accuracy_error and prediction_accurate in SQL, mirroring is_accurate"""
+        if queryset is None:
+            queryset = cls.objects.all()
+        error = ExpressionWrapper(
+            Abs(F('prediction_value') - F('actual_outcome')) / NullIf(F('prediction_value'), Value(0.0)),
+            output_field=models.FloatField()
+        )
+        return queryset.annotate(accuracy_error=error).annotate(
+            prediction_accurate=Case(
+                When(actual_outcome__isnull=True, then=Value(None)),
+                When(prediction_value=0, then=Q(actual_outcome=0)),
+                When(accuracy_error__lte=cls.ACCURACY_ERROR_MARGIN, then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField(null=True)
+            )
+        )
+
+
+SESSION_TYPES = (
+    ('routine', 'Muntazam Tahlil'),
+    ('triggered', 'Avtomatik Ishga Tushgan'),
+    ('manual', 'Qo\'lda Boshlangan'),
+    ('emergency', 'Favqulodda'),
+)
+SESSION_TYPE_LABELS = dict(SESSION_TYPES)
+
+SESSION_STATUS_CHOICES = (
+    ('running', 'Davom etmoqda'),
+    ('completed', 'Yakunlangan'),
+    ('failed', 'Muvaffaqiyatsiz'),
+    ('cancelled', 'Bekor qilingan'),
+)
+SESSION_STATUS_LABELS = dict(SESSION_STATUS_CHOICES)
 
 
 class AIAnalysisSession(models.Model):
     """Model for AI analysis sessions"""
-    SESSION_TYPES = [
-        ('routine', 'Muntazam Tahlil'),
-        ('triggered', 'Avtomatik Ishga Tushgan'),
-        ('manual', 'Qo\'lda Boshlangan'),
-        ('emergency', 'Favqulodda'),
-    ]
-    
-    STATUS_CHOICES = [
-        ('running', 'Davom etmoqda'),
-        ('completed', 'Yakunlangan'),
-        ('failed', 'Muvaffaqiyatsiz'),
-        ('cancelled', 'Bekor qilingan'),
-    ]
+    SESSION_TYPES = SESSION_TYPES
+    SESSION_TYPE_LABELS = SESSION_TYPE_LABELS
+    STATUS_CHOICES = SESSION_STATUS_CHOICES
+    STATUS_LABELS = SESSION_STATUS_LABELS
     
     session_id = models.CharField(max_length=50, unique=True)
-    session_type = models.CharField(max_length=20, choices=SESSION_TYPES)
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    session_type = models.CharField(max_length=20, choices=SESSION_TYPES, db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running', db_index=True)
     
     # Session data
     input_sensors = models.JSONField()  # List of sensors analyzed
@@ -127,8 +255,14 @@ class AIAnalysisSession(models.Model):
     started_at = models.DateTimeField(default=timezone.now)
     completed_at = models.DateTimeField(null=True, blank=True)
     
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['-started_at'], name='aisession_started_desc'),
+        ]
+    
     def __str__(self):
-        return f"AI Analysis {self.session_id} - {self.get_status_display()}"
+        return f"AI Analysis {self.session_id} - {self.STATUS_LABELS.get(self.status, self.status)}"
     
     @property
     def duration_minutes(self):
@@ -136,19 +270,36 @@ class AIAnalysisSession(models.Model):
         if self.completed_at:
             return (self.completed_at - self.started_at).total_seconds() / 60
         return (timezone.now() - self.started_at).total_seconds() / 60
+    
+    @classmethod
+    def annotate_duration(cls, queryset=None, now=None):
+        """Annotate session duration in SQL using one shared 'now' for running sessions"""
+        if queryset is None:
+            queryset = cls.objects.all()
+        if now is None:
+            now = timezone.now()
+        end = Coalesce(F('completed_at'), Value(now, output_field=models.DateTimeField()))
+        return queryset.annotate(
+            duration=ExpressionWrapper(end - F('started_at'), output_field=models.DurationField())
+        )
+
+
+DATA_SOURCES = (
+    ('sensors', 'Datchiklar'),
+    ('weather', 'Ob-havo'),
+    ('irrigation', 'Sug\'orish'),
+    ('plant_growth', 'O\'simlik O\'sishi'),
+    ('user_feedback', 'Foydalanuvchi Fikri'),
+)
+DATA_SOURCE_LABELS = dict(DATA_SOURCES)
 
 
 class AILearningData(models.Model):
     """Model for storing data used for AI learning"""
-    DATA_SOURCES = [
-        ('sensors', 'Datchiklar'),
-        ('weather', 'Ob-havo'),
-        ('irrigation', 'Sug\'orish'),
-        ('plant_growth', 'O\'simlik O\'sishi'),
-        ('user_feedback', 'Foydalanuvchi Fikri'),
-    ]
-    
-    source_type = models.CharField(max_length=20, choices=DATA_SOURCES)
+    DATA_SOURCES = DATA_SOURCES
+    DATA_SOURCE_LABELS = DATA_SOURCE_LABELS
+    
+    source_type = models.CharField(max_length=20, choices=DATA_SOURCES, db_index=True)
     data_point = models.JSONField()  # The actual data
     
     # Metadata
@@ -162,28 +313,49 @@ class AILearningData(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = BulkIngestManager()
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='ailearningdata_created_desc'),
+            models.Index(fields=['created_at'], condition=Q(used_for_training=False), name='aild_untrained'),
+            models.Index(fields=['created_at'], condition=Q(is_anomaly=True), name='aild_anomaly'),
+        ]
+        constraints = [
+            models.CheckConstraint(check=Q(quality_score__gte=0) & Q(quality_score__lte=1), name='aild_quality_range'),
+        ]
+    
     def __str__(self):
-        return f"{self.get_source_type_display()} data - {self.created_at.date()}"
+        return f"{self.DATA_SOURCE_LABELS.get(self.source_type, self.source_type)} data - {self.created_at.date()}"
+
+
+INSIGHT_TYPES = (
+    ('pattern_discovery', 'Naqsh Kashfiyoti'),
+    ('optimization_opportunity', 'Optimizatsiya Imkoniyati'),
+    ('risk_assessment', 'Xavf Baholash'),
+    ('trend_analysis', 'Trend Tahlili'),
+    ('correlation_finding', 'Korrelyatsiya Topish'),
+)
+INSIGHT_TYPE_LABELS = dict(INSIGHT_TYPES)
+
+IMPORTANCE_LEVELS = (
+    ('low', 'Past'),
+    ('medium', 'O\'rtacha'),
+    ('high', 'Yuqori'),
+    ('critical', 'Kritik'),
+)
+IMPORTANCE_LEVEL_LABELS = dict(IMPORTANCE_LEVELS)
 
 
 class AIInsight(models.Model):
     """Model for AI-generated insights and patterns"""
-    INSIGHT_TYPES = [
-        ('pattern_discovery', 'Naqsh Kashfiyoti'),
-        ('optimization_opportunity', 'Optimizatsiya Imkoniyati'),
-        ('risk_assessment', 'Xavf Baholash'),
-        ('trend_analysis', 'Trend Tahlili'),
-        ('correlation_finding', 'Korrelyatsiya Topish'),
-    ]
-    
-    IMPORTANCE_LEVELS = [
-        ('low', 'Past'),
-        ('medium', 'O\'rtacha'),
-        ('high', 'Yuqori'),
-        ('critical', 'Kritik'),
-    ]
-    
-    insight_type = models.CharField(max_length=30, choices=INSIGHT_TYPES)
+    INSIGHT_TYPES = INSIGHT_TYPES
+    INSIGHT_TYPE_LABELS = INSIGHT_TYPE_LABELS
+    IMPORTANCE_LEVELS = IMPORTANCE_LEVELS
+    IMPORTANCE_LEVEL_LABELS = IMPORTANCE_LEVEL_LABELS
+    
+    insight_type = models.CharField(max_length=30, choices=INSIGHT_TYPES, db_index=True)
     title = models.CharField(max_length=200)
     description = models.TextField()
     
@@ -193,7 +365,7 @@ class AIInsight(models.Model):
     confidence_level = models.FloatField(default=0.0)
     
     # Classification
-    importance_level = models.CharField(max_length=20, choices=IMPORTANCE_LEVELS)
+    importance_level = models.CharField(max_length=20, choices=IMPORTANCE_LEVELS, db_index=True)
     tags = models.JSONField(default=list)  # Tags for categorization
     
     # Action items
@@ -207,5 +379,20 @@ class AIInsight(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = BulkIngestManager()
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='aiinsight_created_desc'),
+            models.Index(fields=['created_at'], condition=Q(is_implemented=False), name='aiinsight_pending'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=Q(outcome_rating__isnull=True) | Q(outcome_rating__gte=1, outcome_rating__lte=5),
+                name='aiinsight_outcome_range'
+            ),
+        ]
+    
     def __str__(self):
-        return f"{self.title} ({self.get_importance_level_display()})"
\ No newline at end of file
+        return f"{self.title} ({self.IMPORTANCE_LEVEL_LABELS.get(self.importance_level, self.importance_level)})"
\ No newline at end of file
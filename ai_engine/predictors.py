@@ -3,15 +3,572 @@ AI Prediction Engine
 This module contains the main AI logic for irrigation system predictions.
 """
 
+import asyncio
+import bisect
+import contextvars
+import functools
 import logging
+import math
 import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from types import MappingProxyType
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
+import numpy as np
 from django.utils import timezone
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+try:
+    from numba import njit, prange
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+    prange = range
+    
+    def njit(*args, **kwargs):
+        """Fallback when numba is not installed: run kernels as plain Python"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+try:
+    import hyperscan
+    _HYPERSCAN_AVAILABLE = True
+except ImportError:
+    _HYPERSCAN_AVAILABLE = False
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+
+# Soil moisture tiers: bucket index (as np.digitize) -> table value, driest first
+_MOISTURE_SCORE_EDGES = (25.0, 40.0, 60.0)
+_MOISTURE_SCORE_LUT = (1.0, 0.8, 0.4, 0.1)  # Critical / high / medium / low need
+_DURATION_EDGES = (25.0, 40.0, 55.0)
+_DURATION_LUT = (20, 15, 10, 5)  # Critical / standard / light / minimal minutes
+# Mock analysis plan per duration tier: (need, amount, duration, health score)
+_MOCK_ANALYSIS_PLANS = (
+    ("🚨 KRITIK - Darhol sug'orish zarur", "400-500ml har bir o'simlik uchun", "20-25 daqiqa", 30),
+    ("⚠️ YUQORI - 2-4 soat ichida sug'orish", "300-400ml har bir o'simlik uchun", "15-20 daqiqa", 60),
+    ("📝 O'RTACHA - 6-12 soat ichida rejalash", "200-300ml har bir o'simlik uchun", "10-15 daqiqa", 80),
+    ("✅ YAXSHI - Sug'orish kerak emas", "Kerak emas yoki 100ml profilaktika uchun", "5 daqiqa yengil namlash", 95),
+)
+_NEXT_CHECK_LABELS = ("1 soat ichida", "3 soat ichida", "6 soat ichida", "12 soat ichida")
+
+# Score ladders: label index = number of edges the score is above (recommendation)
+# or at/above (health status), so NaN falls to the first label as in the old else branch
+_RECOMMENDATION_EDGES = (0.3, 0.5, 0.7, 0.9)
+_RECOMMENDATION_LABELS = (
+    "Sug'orish kerak emas - Tuproq namligi yetarli.",
+    "Past prioritet - Kuzatishda saqlang, hozircha sug'orish shart emas.",
+    "O'rtacha prioritet - 6 soat ichida sug'orish rejalashtiring.",
+    "Yuqori prioritet - 2 soat ichida sug'orish tavsiya etiladi.",
+    "KRITIK - Darhol sug'orish kerak! Tuproq juda quruq."
+)
+_HEALTH_STATUS_EDGES = (0.4, 0.6, 0.75, 0.9)
+_HEALTH_STATUS_LABELS = ("Kritik", "Yomon", "O'rtacha", "Yaxshi", "A'lo")
+# Same ladder on the 0-100 scale; the mock Gemini analysis sends the bucket
+# index (0-4) and the dashboard localizes it, labels kept for server-side text
+_HEALTH_PERCENT_EDGES = (40, 60, 75, 90)
+_HEALTH_PERCENT_LABELS = (
+    "Kritik - 40% dan past", "Yomon - 40-59%", "O'rtacha - 60-74%", "Yaxshi - 75-89%", "A'lo - 90%+"
+)
+
+# Plant health rules, checked in order:
+# recommendations take (growth, stress, environment, soil_moisture, temperature, ph)
+_HEALTH_RECOMMENDATION_RULES = (
+    (lambda growth, stress, environment, sm, t, ph: stress > 0.6,
+     "Stress omillarini kamaytirishga e'tibor bering"),
+    (lambda growth, stress, environment, sm, t, ph: stress > 0.6 and sm < 40,
+     "Sug'orish chastotasini oshiring"),
+    (lambda growth, stress, environment, sm, t, ph: growth < 0.6,
+     "O'simlik o'sishini stimulyatsiya qiling"),
+    (lambda growth, stress, environment, sm, t, ph: growth < 0.6,
+     "O'g'it qo'llashni ko'rib chiqing"),
+    (lambda growth, stress, environment, sm, t, ph: environment < 0.7 and t > 30,
+     "Haroratni kamaytirish choralarini ko'ring"),
+    (lambda growth, stress, environment, sm, t, ph: environment < 0.7 and (ph < 6.0 or ph > 7.5),
+     "Tuproq pH darajasini sozlang"),
+)
+# risk factors take (stress, soil_moisture, temperature)
+_PLANT_RISK_RULES = (
+    (lambda stress, sm, t: stress > 0.7, {
+        'type': 'high_stress',
+        'severity': 'high',
+        'description': 'O\'simlik yuqori stress darajasida',
+        'action': 'Darhol choralar ko\'ring'
+    }),
+    (lambda stress, sm, t: sm < 25, {
+        'type': 'drought_stress',
+        'severity': 'critical',
+        'description': 'Qurg\'oqchilik stressi',
+        'action': 'Darhol sug\'orish kerak'
+    }),
+    (lambda stress, sm, t: t > 35, {
+        'type': 'heat_stress',
+        'severity': 'high',
+        'description': 'Issiqlik stressi',
+        'action': 'Soyalash yoki sovutish choralarini ko\'ring'
+    }),
+)
+
+# Mock analysis alert templates (read-only, appended by reference)
+_ALERT_CRITICAL_MOISTURE = MappingProxyType({
+    'level': 'CRITICAL',
+    'message': 'O\'simlik hayotiga xavf - darhol sug\'orish',
+    'action': 'Zudlik bilan choralar ko\'ring'
+})
+_ALERT_LOW_MOISTURE = MappingProxyType({
+    'level': 'WARNING',
+    'message': 'Tuproq namligi past - nazorat qiling',
+    'action': '4 soat ichida sug\'orish rejalashtiring'
+})
+_ALERT_EXTREME_HEAT = MappingProxyType({
+    'level': 'CRITICAL',
+    'message': 'Haddan tashqari issiqlik',
+    'action': 'Soyalash va sovutish choralari'
+})
+
+# Mock analysis conditions per tier: (stress indicators, (risk bucket, risk) pairs, alerts)
+_MOISTURE_CONDITION_EDGES = (20, 25, 30, 35, 40)  # Tier = edges the moisture is not below
+_MOISTURE_CONDITIONS = (
+    (("🚨 Qurg'oqchilik stressi - darhol harakat kerak",),
+     (('immediate', "Kritik qurg'oqchilik - o'simlik nobud bo'lish xavfi"),),
+     (_ALERT_CRITICAL_MOISTURE,)),
+    (("🚨 Qurg'oqchilik stressi - darhol harakat kerak",),
+     (('short_term', "Suv tanqisligi - 24 soat ichida choralar ko'ring"),),
+     (_ALERT_LOW_MOISTURE,)),
+    (("⚠️ Engil suv tanqisligi",),
+     (('short_term', "Suv tanqisligi - 24 soat ichida choralar ko'ring"),),
+     (_ALERT_LOW_MOISTURE,)),
+    (("⚠️ Engil suv tanqisligi",),
+     (('short_term', "Suv tanqisligi - 24 soat ichida choralar ko'ring"),),
+     ()),
+    (("⚠️ Engil suv tanqisligi",), (), ()),
+    ((), (), ()),
+)
+_TEMPERATURE_CONDITION_EDGES = (28, 32, 35)  # Tier = edges the temperature is above
+_TEMPERATURE_CONDITIONS = (
+    ((), (), ()),
+    (("🌡️ Yuqori harorat stressi",), (), ()),
+    (("🔥 Issiqlik stressi - soyalash kerak",), (), ()),
+    (("🔥 Issiqlik stressi - soyalash kerak",),
+     (('immediate', "Haddan tashqari issiqlik - zudlik bilan soyalash"),),
+     (_ALERT_EXTREME_HEAT,)),
+)
+_PREVENTIVE_RISK_ADVICE = (
+    "Mulch qo'llash - suv tejash va ildiz himoyasi",
+    "Muntazam monitoring - problem oldini olish"
+)
+
+# Static parts of the mock analysis recommendations (read-only, shared by all calls)
+_ENVIRONMENTAL_RECOMMENDATIONS = MappingProxyType({
+    'microclimate': (
+        "Soyalash to'rlari o'rnatish (UV himoyasi)",
+        "Shamol to'siq o'simliklarini ekish",
+        "Mulch bilan tuproq qoplash"
+    ),
+    'air_circulation': (
+        "Yetarli o'simliklar orasidagi masofa",
+        "Havo aylanishini yaxshilash",
+        "Zichlik muammolarini hal qilish"
+    ),
+    'soil_improvement': (
+        "Organik moddalar qo'shish",
+        "Drenaj tizimini yaxshilash",
+        "pH darajasini sozlash"
+    )
+})
+_WATER_SAVING_TIPS = ("Tomchilatib sug'orish tizimi", "Optimal vaqtlarda sug'orish")
+_EFFICIENCY_RECOMMENDATIONS = MappingProxyType({
+    'energy_saving': (
+        "Quyosh energiyasi dari pompalari",
+        "Smart timer'lar ishlatish",
+        "Sensor asosida avtomatlashtirish"
+    ),
+    'technology_upgrades': (
+        "IoT datchiklar qo'shimcha o'rnatish",
+        "Weather station integratsiyasi",
+        "AI bashorat tizimini kengaytirish"
+    )
+})
+
+# Reading-independent irrigation reasons
+_NO_RAIN_REASON = "Yaqin kelajakda yomg'ir kutilmaydi"
+_ALL_NORMAL_REASON = "Barcha ko'rsatkichlar normal diapazonida"
+
+
+@njit(cache=True)
+def _moisture_tier(soil_moisture, edges):
+    """Branch-free np.digitize for one reading; NaN falls into the last (wettest) tier"""
+    below = 0
+    for edge in edges:
+        below += soil_moisture < edge
+    return len(edges) - below
+
+
+@njit(cache=True)
+def _irrigation_score_kernel(soil_moisture, air_humidity, temperature, rainfall):
+    """Calculate irrigation need score (0-1)"""
+    
+    # Soil moisture weight (most important factor)
+    moisture_weight = 0.5
+    moisture_score = _MOISTURE_SCORE_LUT[_moisture_tier(soil_moisture, _MOISTURE_SCORE_EDGES)]
+    
+    # Air humidity weight
+    humidity_weight = 0.2
+    humidity_score = max(0, (70 - air_humidity) / 70)  # Lower humidity = higher score
+    
+    # Temperature weight
+    temp_weight = 0.2
+    temp_score = max(0, (temperature - 20) / 15)  # Higher temp = higher score
+    
+    # Rainfall forecast weight (negative factor)
+    rain_weight = 0.1
+    rain_score = max(0, 1 - rainfall / 10)  # More rain = lower score
+    
+    # Combined score
+    total_score = (
+        moisture_score * moisture_weight +
+        humidity_score * humidity_weight +
+        temp_score * temp_weight +
+        rain_score * rain_weight
+    )
+    
+    return min(1.0, total_score)
+
+
+@njit(cache=True)
+def _duration_kernel(soil_moisture):
+    """Calculate irrigation duration in minutes"""
+    return _DURATION_LUT[_moisture_tier(soil_moisture, _DURATION_EDGES)]
+
+
+@njit(cache=True)
+def _water_amount_kernel(soil_moisture, temperature):
+    """Calculate water amount in ml"""
+    base_amount = 300
+    
+    # Adjust for soil moisture
+    moisture_factor = max(0.5, (60 - soil_moisture) / 60)
+    
+    # Adjust for temperature
+    temp_factor = 1 + max(0, (temperature - 20) / 40)
+    
+    return int(base_amount * moisture_factor * temp_factor)
+
+
+@njit(cache=True)
+def _irrigation_kernel(soil_moisture, air_humidity, temperature, rainfall):
+    """Fused score, duration and water amount for one set of readings"""
+    return (
+        _irrigation_score_kernel(soil_moisture, air_humidity, temperature, rainfall),
+        _duration_kernel(soil_moisture),
+        _water_amount_kernel(soil_moisture, temperature)
+    )
+
+
+
+@njit(cache=True)
+def _growth_kernel(days_since_planted, actual_height):
+    """Assess plant growth rate (0-1)"""
+    expected_height = days_since_planted * 0.8  # Mock expected growth
+    
+    if expected_height > 0:
+        growth_ratio = min(1.2, actual_height / expected_height)
+        return min(1.0, growth_ratio)
+    return 0.5
+
+
+@njit(cache=True)
+def _growth_trend_kernel(days_since_planted, heights):
+    """Growth rate (0-1) from the least-squares height slope against the expected 0.8/day"""
+    day_offsets = days_since_planted - days_since_planted.mean()
+    spread = (day_offsets * day_offsets).sum()
+    if spread == 0:
+        return 0.5
+    slope = (day_offsets * (heights - heights.mean())).sum() / spread
+    return min(1.0, max(0.0, slope / 0.8))
+
+
+@njit(cache=True)
+def _stress_kernel(soil_moisture, temperature, ph):
+    """Detect plant stress indicators (0-1, higher = more stress)"""
+    # Only the strongest factor matters, so keep a running maximum
+    # (every factor exceeds the 0.1 baseline)
+    stress = 0.1
+    
+    # Moisture stress
+    if soil_moisture < 30:
+        stress = 0.8
+    elif soil_moisture < 45:
+        stress = 0.4
+    
+    # Temperature stress
+    if temperature > 32 or temperature < 10:
+        stress = 0.9
+    elif (temperature > 28 or temperature < 15) and stress < 0.3:
+        stress = 0.3
+    
+    # pH stress
+    if (ph < 5.5 or ph > 8.0) and stress < 0.7:
+        stress = 0.7
+    elif (ph < 6.0 or ph > 7.5) and stress < 0.2:
+        stress = 0.2
+    
+    return stress
+
+
+@njit(cache=True)
+def _environment_kernel(soil_moisture, temperature):
+    """Evaluate environmental conditions (0-1)"""
+    # Optimal ranges
+    if 60 <= soil_moisture <= 80:
+        moisture_factor = 1.0
+    elif 40 <= soil_moisture < 60 or 80 < soil_moisture <= 90:
+        moisture_factor = 0.7
+    else:
+        moisture_factor = 0.3
+    
+    if 18 <= temperature <= 26:
+        temperature_factor = 1.0
+    elif 15 <= temperature < 18 or 26 < temperature <= 30:
+        temperature_factor = 0.7
+    else:
+        temperature_factor = 0.3
+    
+    return (moisture_factor + temperature_factor) / 2
+
+
+@njit(parallel=True, cache=True)
+def _irrigation_batch_kernel(soil_moisture, air_humidity, temperature, rainfall,
+                             out_score, out_duration, out_water):
+    """Fill per-zone outputs in place; zones are independent so they run in parallel"""
+    for i in prange(soil_moisture.shape[0]):
+        score, duration, water = _irrigation_kernel(
+            soil_moisture[i], air_humidity[i], temperature[i], rainfall[i]
+        )
+        out_score[i] = score
+        out_duration[i] = duration
+        out_water[i] = water
+
+@njit(parallel=True, cache=True)
+def _plant_health_batch_kernel(soil_moisture, temperature, ph, days_since_planted, height,
+                               out_growth, out_stress, out_environment):
+    """Fill per-plant health component scores in place, in parallel"""
+    for i in prange(soil_moisture.shape[0]):
+        out_growth[i] = _growth_kernel(days_since_planted[i], height[i])
+        out_stress[i] = _stress_kernel(soil_moisture[i], temperature[i], ph[i])
+        out_environment[i] = _environment_kernel(soil_moisture[i], temperature[i])
+
+if _NUMBA_AVAILABLE:
+    # Compile once at import so the first request does not pay the JIT cost
+    _irrigation_kernel(50.0, 60.0, 25.0, 0.0)
+    _growth_kernel(10.0, 8.0)
+    _growth_trend_kernel(np.array([0.0, 10.0]), np.array([0.0, 8.0]))
+    _stress_kernel(50.0, 25.0, 6.8)
+    _environment_kernel(50.0, 25.0)
+
+
+# Keyword groups scanned in Gemini responses (matched against lowercased text)
+CRITICAL_URGENCY_KEYWORDS = ('критик', 'critical', 'urgent', 'darhol', 'зуур')
+HIGH_URGENCY_KEYWORDS = ('yuqori', 'high', 'prioritet', 'tavsiya')
+IRRIGATION_KEYWORDS = ("sug'orish", 'irrigation', 'water')
+MORNING_TIMING_KEYWORDS = ('ertalab', 'morning', '6:00', '7:00', '8:00')
+EVENING_TIMING_KEYWORDS = ('kechqurun', 'evening', '18:00', '19:00', '20:00')
+# Scanned together by _scan_keyword_groups; order defines the returned flags
+_KEYWORD_GROUPS = (
+    CRITICAL_URGENCY_KEYWORDS,
+    HIGH_URGENCY_KEYWORDS,
+    IRRIGATION_KEYWORDS,
+    MORNING_TIMING_KEYWORDS,
+    EVENING_TIMING_KEYWORDS,
+)
+
+if _HYPERSCAN_AVAILABLE:
+    # One literal-pattern database for every keyword; a match id maps back to its group
+    _KEYWORD_GROUP_BY_ID = tuple(index for index, group in enumerate(_KEYWORD_GROUPS) for _ in group)
+    _KEYWORD_DATABASE = hyperscan.Database()
+    _KEYWORD_DATABASE.compile(
+        expressions=[word.encode('utf-8') for group in _KEYWORD_GROUPS for word in group],
+        ids=list(range(len(_KEYWORD_GROUP_BY_ID))),
+        elements=len(_KEYWORD_GROUP_BY_ID),
+        flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(_KEYWORD_GROUP_BY_ID)
+    )
+    # Scratch space must not be shared between concurrently scanning threads
+    _keyword_scratch = threading.local()
+
+
+def _scan_keyword_groups(response_lower: str) -> List[bool]:
+    """Which _KEYWORD_GROUPS occur in the lowercased text, in a single pass when hyperscan is installed"""
+    if not _HYPERSCAN_AVAILABLE:
+        return [any(word in response_lower for word in group) for group in _KEYWORD_GROUPS]
+    
+    scratch = getattr(_keyword_scratch, 'scratch', None)
+    if scratch is None:
+        scratch = _keyword_scratch.scratch = hyperscan.Scratch(_KEYWORD_DATABASE)
+    
+    hits = [False] * len(_KEYWORD_GROUPS)
+    
+    def on_match(pattern_id, start, end, flags, context):
+        hits[_KEYWORD_GROUP_BY_ID[pattern_id]] = True
+    
+    _KEYWORD_DATABASE.scan(response_lower.encode('utf-8'), match_event_handler=on_match, scratch=scratch)
+    return hits
+
+
+# Section markers requested in the analysis prompt (1-7)
+GEMINI_SECTION_MARKERS = ('🚨', '⏰', '🌱', '⚠', '🔬', '💰', '📊')
+
+# Urgency flag bits, computed once per response for the insight and action-plan builders
+_RESPONSE_CRITICAL = 1  # 'kritik' or 'critical'
+_RESPONSE_URGENT = 2  # 'urgent'
+
+
+def _response_flags(response_lower: str) -> int:
+    """Urgency flag bits of a lowercased Gemini response"""
+    flags = 0
+    if 'kritik' in response_lower or 'critical' in response_lower:
+        flags |= _RESPONSE_CRITICAL
+    if 'urgent' in response_lower:
+        flags |= _RESPONSE_URGENT
+    return flags
+
+
+# Timestamp pinned for the current HTTP request (see ai_engine.middleware)
+_request_timestamp = contextvars.ContextVar('request_timestamp', default=None)
+
+
+def _now_iso() -> str:
+    """Current time as ISO-8601 (one value per request, see ai_engine.middleware)"""
+    return _request_timestamp.get() or timezone.now().isoformat()
+
+
+def _optimal_timing_for_hour(hour: int) -> Dict:
+    """Irrigation timing advice for a given local hour (0-23)"""
+    
+    # Best times are early morning (6-8) or evening (18-20)
+    if 6 <= hour <= 8:
+        return {
+            'timing': 'optimal',
+            'message': 'Hozirgi vaqt optimal - ertalab soatlari',
+            'next_optimal': 'Bugun kechqurun 18:00-20:00'
+        }
+    elif 18 <= hour <= 20:
+        return {
+            'timing': 'optimal',
+            'message': 'Hozirgi vaqt optimal - kechqurun soatlari',
+            'next_optimal': 'Ertaga ertalab 06:00-08:00'
+        }
+    elif 10 <= hour <= 16:
+        return {
+            'timing': 'avoid',
+            'message': 'Kunduzi sug\'orish tavsiya etilmaydi - suv bug\'lanadi',
+            'next_optimal': 'Bugun kechqurun 18:00-20:00'
+        }
+    else:
+        return {
+            'timing': 'acceptable',
+            'message': 'Qabul qilinadigan vaqt',
+            'next_optimal': 'Ertalab 06:00-08:00'
+        }
+
+
+# Timing advice depends only on the hour, so all 24 answers are built once
+_TIMING_BY_HOUR = tuple(MappingProxyType(_optimal_timing_for_hour(hour)) for hour in range(24))
+
+def _detailed_timing_for_hour(hour: int) -> Dict:
+    """Detailed timing advice for the mock Gemini analysis; 11-16 gets its reasoning per call"""
+    timing_info = {
+        'best_times': ("06:00-08:00 (Ertalab)", "18:00-20:00 (Kechqurun)"),
+        'avoid_times': ("11:00-16:00 (Kunduzi)",),
+        'current_status': '',
+        'next_optimal': '',
+        'reasoning': ''
+    }
+    
+    if 6 <= hour <= 8:
+        timing_info['current_status'] = "✅ HOZIR OPTIMAL VAQT"
+        timing_info['reasoning'] = "Ertalab - bug'lanish minimal, o'simliklar faol"
+    elif 18 <= hour <= 20:
+        timing_info['current_status'] = "✅ HOZIR OPTIMAL VAQT"
+        timing_info['reasoning'] = "Kechqurun - harorat pasaygan, tunu davomida namlash"
+    elif 11 <= hour <= 16:
+        timing_info['current_status'] = "❌ HOZIR NOTO'G'RI VAQT"
+        timing_info['next_optimal'] = "Kechqurun 18:00 dan keyin"
+    else:
+        timing_info['current_status'] = "⚡ FAVQULODDA HOLATLARDA MUMKIN"
+        timing_info['reasoning'] = "Qabul qilinadigan vaqt, lekin optimal emas"
+    
+    return timing_info
+
+
+_DETAILED_TIMING_BY_HOUR = tuple(MappingProxyType(_detailed_timing_for_hour(hour)) for hour in range(24))
+
+# (Unix time the cached hour stays valid until, local hour)
+_local_hour_state = (0.0, 0)
+
+
+def _local_hour() -> int:
+    """Current local hour; timezone.localtime() runs only when an hour boundary is crossed"""
+    global _local_hour_state
+    valid_until, hour = _local_hour_state
+    if time.time() < valid_until:
+        return hour
+    
+    local_now = timezone.localtime()
+    next_hour = local_now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    _local_hour_state = (next_hour.timestamp(), local_now.hour)
+    return local_now.hour
+
+
+@dataclass(slots=True, frozen=True)
+class IrrigationInputs:
+    """The readings irrigation scoring depends on, for one management zone"""
+    soil_moisture: float = 50
+    air_humidity: float = 60
+    temperature: float = 25
+    rainfall_forecast: float = 0
+    
+    @classmethod
+    def from_dicts(cls, sensor_data: Dict, weather_data: Dict) -> 'IrrigationInputs':
+        """Read the inputs (with predict_irrigation_need's defaults) from sensor/weather dicts"""
+        return cls(
+            sensor_data.get('soil_moisture', 50),
+            sensor_data.get('air_humidity', 60),
+            sensor_data.get('temperature', 25),
+            weather_data.get('rainfall_forecast', 0)
+        )
+    
+    @staticmethod
+    def to_arrays(zones: List['IrrigationInputs']) -> Tuple[np.ndarray, ...]:
+        """Structure-of-arrays view of many zones, in predict_irrigation_need_batch argument order"""
+        count = len(zones)
+        return (
+            np.fromiter((zone.soil_moisture for zone in zones), np.float64, count),
+            np.fromiter((zone.air_humidity for zone in zones), np.float64, count),
+            np.fromiter((zone.temperature for zone in zones), np.float64, count),
+            np.fromiter((zone.rainfall_forecast for zone in zones), np.float64, count)
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class IrrigationPrediction:
+    """Numeric part of predict_irrigation_need's result, for aggregating many zones"""
+    need_irrigation: bool
+    irrigation_score: float
+    confidence_score: float
+    predicted_duration_minutes: int
+    water_amount_ml: int
+
 
 class IrrigationPredictor:
     """AI predictor for irrigation needs"""
@@ -20,7 +577,8 @@ class IrrigationPredictor:
         self.model_version = "1.2.3"
         self.accuracy = 94.2  # Mock accuracy percentage
         
-    def predict_irrigation_need(self, sensor_data: Dict, weather_data: Dict, plant_data: Dict) -> Dict:
+    def predict_irrigation_need(self, sensor_data: Dict, weather_data: Dict, plant_data: Dict,
+                                include_reasoning: bool = True) -> Dict:
         """
         Predict if irrigation is needed based on sensor, weather, and plant data
         
@@ -28,6 +586,8 @@ class IrrigationPredictor:
             sensor_data (dict): Current sensor readings
             weather_data (dict): Weather information
             plant_data (dict): Plant health and growth data
+            include_reasoning (bool): Build the reasoning text; callers that only
+                need the numbers pass False and get None
             
         Returns:
             dict: Prediction results with confidence score and recommendations
@@ -40,8 +600,8 @@ class IrrigationPredictor:
             rainfall_forecast = weather_data.get('rainfall_forecast', 0)
             
             # AI prediction logic (simplified for demonstration)
-            irrigation_score = self._calculate_irrigation_score(
-                soil_moisture, air_humidity, temperature, rainfall_forecast
+            irrigation_score, duration_minutes, water_amount_ml = _irrigation_kernel(
+                float(soil_moisture), float(air_humidity), float(temperature), float(rainfall_forecast)
             )
             
             # Determine irrigation need
@@ -64,15 +624,15 @@ class IrrigationPredictor:
                 'optimal_timing': optimal_timing,
                 'reasoning': self._generate_reasoning(
                     soil_moisture, air_humidity, temperature, rainfall_forecast, irrigation_score
-                ),
-                'predicted_duration_minutes': self._calculate_duration(soil_moisture),
-                'water_amount_ml': self._calculate_water_amount(soil_moisture, temperature),
+                ) if include_reasoning else None,
+                'predicted_duration_minutes': duration_minutes,
+                'water_amount_ml': water_amount_ml,
                 'model_version': self.model_version,
-                'timestamp': timezone.now().isoformat()
+                'timestamp': _now_iso()
             }
             
         except Exception as e:
-            logger.error(f"Irrigation prediction error: {e}")
+            logger.error("Irrigation prediction error: %s", e)
             return {
                 'error': str(e),
                 'need_irrigation': False,
@@ -80,115 +640,132 @@ class IrrigationPredictor:
                 'recommendation': 'AI tahlil xatosi - qo\'lda tekshiring'
             }
     
+    def predict_zone(self, inputs: IrrigationInputs) -> IrrigationPrediction:
+        """
+        predict_irrigation_need without the text fields, as a slotted record
+        
+        Use dataclasses.asdict() where a JSON-ready dict is needed.
+        """
+        irrigation_score, duration_minutes, water_amount_ml = _irrigation_kernel(
+            float(inputs.soil_moisture), float(inputs.air_humidity),
+            float(inputs.temperature), float(inputs.rainfall_forecast)
+        )
+        return IrrigationPrediction(
+            irrigation_score > 0.7,
+            round(irrigation_score, 3),
+            round(min(95, irrigation_score * 100), 1),
+            duration_minutes,
+            water_amount_ml
+        )
+    
     def _calculate_irrigation_score(self, soil_moisture: float, air_humidity: float, 
                                    temperature: float, rainfall: float) -> float:
         """Calculate irrigation need score (0-1)"""
+        return _irrigation_score_kernel(soil_moisture, air_humidity, temperature, rainfall)
+    
+    def _calculate_irrigation_score_batch(self, soil_moisture, air_humidity,
+                                          temperature, rainfall) -> np.ndarray:
+        """Vectorized _calculate_irrigation_score over 1-D arrays of readings (0-1 each)"""
+        soil_moisture = np.asarray(soil_moisture)
+        air_humidity = np.asarray(air_humidity)
+        temperature = np.asarray(temperature)
+        rainfall = np.asarray(rainfall)
+        
+        # Keep float32 inputs in float32; anything else is scored in float64
+        score_lut = np.asarray(_MOISTURE_SCORE_LUT, dtype=np.result_type(soil_moisture, np.float32))
+        moisture_score = score_lut[np.digitize(soil_moisture, _MOISTURE_SCORE_EDGES)]
+        # fmax ignores NaN like the scalar max() does
+        humidity_score = np.fmax(0, (70 - air_humidity) / 70)
+        temp_score = np.fmax(0, (temperature - 20) / 15)
+        rain_score = np.fmax(0, 1 - rainfall / 10)
+        
+        total_score = 0.5 * moisture_score + 0.2 * humidity_score + 0.2 * temp_score + 0.1 * rain_score
+        # Cap in place; builtin min() stays in the scalar kernels, where ufunc dispatch costs more
+        return np.minimum(total_score, 1.0, out=total_score)
+    
+    def predict_irrigation_need_batch(self, soil_moisture, air_humidity,
+                                      temperature, rainfall_forecast, dtype=np.float64) -> Dict:
+        """
+        Predict irrigation need for many management zones at once
         
-        # Soil moisture weight (most important factor)
-        moisture_weight = 0.5
-        if soil_moisture < 25:
-            moisture_score = 1.0  # Critical need
-        elif soil_moisture < 40:
-            moisture_score = 0.8  # High need
-        elif soil_moisture < 60:
-            moisture_score = 0.4  # Medium need
+        Args:
+            soil_moisture, air_humidity, temperature, rainfall_forecast: 1-D arrays,
+                one entry per zone (see IrrigationInputs.to_arrays)
+            dtype: Working float type. np.float32 halves memory traffic for very
+                large batches, but readings within float32 rounding of a tier
+                boundary may land in the neighbouring tier
+            
+        Returns:
+            dict: Per-zone arrays of scores, durations and water amounts
+        """
+        soil_moisture = np.ascontiguousarray(soil_moisture, dtype=dtype)
+        air_humidity = np.ascontiguousarray(air_humidity, dtype=dtype)
+        temperature = np.ascontiguousarray(temperature, dtype=dtype)
+        rainfall_forecast = np.ascontiguousarray(rainfall_forecast, dtype=dtype)
+        
+        if _NUMBA_AVAILABLE:
+            zone_count = soil_moisture.shape[0]
+            irrigation_score = np.empty(zone_count, dtype=dtype)
+            duration_minutes = np.empty(zone_count, dtype=np.int64)
+            water_amount_ml = np.empty(zone_count, dtype=np.int64)
+            _irrigation_batch_kernel(
+                soil_moisture, air_humidity, temperature, rainfall_forecast,
+                irrigation_score, duration_minutes, water_amount_ml
+            )
         else:
-            moisture_score = 0.1  # Low need
-        
-        # Air humidity weight
-        humidity_weight = 0.2
-        humidity_score = max(0, (70 - air_humidity) / 70)  # Lower humidity = higher score
-        
-        # Temperature weight
-        temp_weight = 0.2
-        temp_score = max(0, (temperature - 20) / 15)  # Higher temp = higher score
-        
-        # Rainfall forecast weight (negative factor)
-        rain_weight = 0.1
-        rain_score = max(0, 1 - rainfall / 10)  # More rain = lower score
-        
-        # Combined score
-        total_score = (
-            moisture_score * moisture_weight +
-            humidity_score * humidity_weight +
-            temp_score * temp_weight +
-            rain_score * rain_weight
-        )
+            irrigation_score = self._calculate_irrigation_score_batch(
+                soil_moisture, air_humidity, temperature, rainfall_forecast
+            )
+            duration_minutes = np.take(_DURATION_LUT, np.digitize(soil_moisture, _DURATION_EDGES))
+            moisture_factor = np.fmax(0.5, (60 - soil_moisture) / 60)  # NaN -> 0.5, as in max()
+            temp_factor = 1 + np.fmax(0, (temperature - 20) / 40)
+            water_amount_ml = (300 * moisture_factor * temp_factor).astype(np.int64)
+        
+        confidence_score = irrigation_score * 100
+        np.minimum(confidence_score, 95, out=confidence_score)
         
-        return min(1.0, total_score)
+        return {
+            'need_irrigation': irrigation_score > 0.7,
+            'irrigation_score': irrigation_score,
+            'confidence_score': confidence_score,
+            'recommendation': self._generate_irrigation_recommendation_batch(irrigation_score),
+            'predicted_duration_minutes': duration_minutes,
+            'water_amount_ml': water_amount_ml,
+            'model_version': self.model_version,
+            'timestamp': _now_iso()
+        }
     
     def _generate_irrigation_recommendation(self, score: float, soil_moisture: float, 
                                           weather_data: Dict) -> str:
         """Generate human-readable recommendation"""
-        
-        if score > 0.9:
-            return "KRITIK - Darhol sug'orish kerak! Tuproq juda quruq."
-        elif score > 0.7:
-            return "Yuqori prioritet - 2 soat ichida sug'orish tavsiya etiladi."
-        elif score > 0.5:
-            return "O'rtacha prioritet - 6 soat ichida sug'orish rejalashtiring."
-        elif score > 0.3:
-            return "Past prioritet - Kuzatishda saqlang, hozircha sug'orish shart emas."
-        else:
-            return "Sug'orish kerak emas - Tuproq namligi yetarli."
+        return _RECOMMENDATION_LABELS[bisect.bisect_left(_RECOMMENDATION_EDGES, score)]
+    
+    def _generate_irrigation_recommendation_batch(self, scores) -> np.ndarray:
+        """Vectorized _generate_irrigation_recommendation over an array of scores"""
+        scores = np.asarray(scores)
+        index = np.digitize(scores, _RECOMMENDATION_EDGES, right=True)
+        index[np.isnan(scores)] = 0
+        return np.asarray(_RECOMMENDATION_LABELS, dtype=object)[index]
     
     def _calculate_optimal_timing(self, weather_data: Dict, temperature: float) -> Dict:
         """Calculate optimal irrigation timing"""
-        
-        current_hour = timezone.now().hour
-        
-        # Best times are early morning (6-8) or evening (18-20)
-        if 6 <= current_hour <= 8:
-            return {
-                'timing': 'optimal',
-                'message': 'Hozirgi vaqt optimal - ertalab soatlari',
-                'next_optimal': 'Bugun kechqurun 18:00-20:00'
-            }
-        elif 18 <= current_hour <= 20:
-            return {
-                'timing': 'optimal',
-                'message': 'Hozirgi vaqt optimal - kechqurun soatlari',
-                'next_optimal': 'Ertaga ertalab 06:00-08:00'
-            }
-        elif 10 <= current_hour <= 16:
-            return {
-                'timing': 'avoid',
-                'message': 'Kunduzi sug\'orish tavsiya etilmaydi - suv bug\'lanadi',
-                'next_optimal': 'Bugun kechqurun 18:00-20:00'
-            }
-        else:
-            return {
-                'timing': 'acceptable',
-                'message': 'Qabul qilinadigan vaqt',
-                'next_optimal': 'Ertalab 06:00-08:00'
-            }
+        return _TIMING_BY_HOUR[_local_hour()]
     
     def _calculate_duration(self, soil_moisture: float) -> int:
         """Calculate irrigation duration in minutes"""
-        if soil_moisture < 25:
-            return 20  # Critical - longer irrigation
-        elif soil_moisture < 40:
-            return 15  # Standard irrigation
-        elif soil_moisture < 55:
-            return 10  # Light irrigation
-        else:
-            return 5   # Minimal irrigation
+        return _duration_kernel(soil_moisture)
     
     def _calculate_water_amount(self, soil_moisture: float, temperature: float) -> int:
         """Calculate water amount in ml"""
-        base_amount = 300
-        
-        # Adjust for soil moisture
-        moisture_factor = max(0.5, (60 - soil_moisture) / 60)
-        
-        # Adjust for temperature
-        temp_factor = 1 + max(0, (temperature - 20) / 40)
-        
-        return int(base_amount * moisture_factor * temp_factor)
+        return _water_amount_kernel(soil_moisture, temperature)
     
     def _generate_reasoning(self, soil_moisture: float, air_humidity: float, 
                           temperature: float, rainfall: float, score: float) -> str:
         """Generate AI reasoning explanation"""
+        # Moisture, humidity and temperature all normal: only rainfall can add a reason
+        if soil_moisture >= 50 and air_humidity >= 50 and temperature <= 28:
+            return _NO_RAIN_REASON if rainfall < 2 else _ALL_NORMAL_REASON
+        
         reasons = []
         
         if soil_moisture < 30:
@@ -203,10 +780,10 @@ class IrrigationPredictor:
             reasons.append(f"Yuqori harorat ({temperature}°C)")
         
         if rainfall < 2:
-            reasons.append("Yaqin kelajakda yomg'ir kutilmaydi")
+            reasons.append(_NO_RAIN_REASON)
         
         if not reasons:
-            reasons.append("Barcha ko'rsatkichlar normal diapazonida")
+            reasons.append(_ALL_NORMAL_REASON)
         
         return " • ".join(reasons)
 
@@ -256,116 +833,133 @@ class PlantHealthAnalyzer:
                 'recommendations': recommendations,
                 'risk_factors': self._identify_risk_factors(sensor_data, stress_score),
                 'model_version': self.model_version,
-                'timestamp': timezone.now().isoformat()
+                'timestamp': _now_iso()
             }
             
         except Exception as e:
-            logger.error(f"Plant health analysis error: {e}")
+            logger.error("Plant health analysis error: %s", e)
             return {
                 'error': str(e),
                 'overall_health_score': 0,
                 'health_status': 'unknown'
             }
     
+    def analyze_plant_health_batch(self, soil_moisture, temperature, ph,
+                                   days_since_planted, height) -> Dict:
+        """
+        Score the health of many plants at once
+        
+        Args:
+            soil_moisture, temperature, ph, days_since_planted, height: 1-D arrays,
+                one entry per plant
+            
+        Returns:
+            dict: Per-plant arrays of scores (0-100) and health status labels;
+                text recommendations and risk factors stay per-plant in analyze_plant_health
+        """
+        soil_moisture = np.ascontiguousarray(soil_moisture, dtype=np.float64)
+        temperature = np.ascontiguousarray(temperature, dtype=np.float64)
+        ph = np.ascontiguousarray(ph, dtype=np.float64)
+        days_since_planted = np.ascontiguousarray(days_since_planted, dtype=np.float64)
+        height = np.ascontiguousarray(height, dtype=np.float64)
+        
+        if _NUMBA_AVAILABLE:
+            plant_count = soil_moisture.shape[0]
+            growth_score = np.empty(plant_count, dtype=np.float64)
+            stress_score = np.empty(plant_count, dtype=np.float64)
+            environment_score = np.empty(plant_count, dtype=np.float64)
+            _plant_health_batch_kernel(
+                soil_moisture, temperature, ph, days_since_planted, height,
+                growth_score, stress_score, environment_score
+            )
+        else:
+            expected_height = days_since_planted * 0.8
+            with np.errstate(divide='ignore', invalid='ignore'):
+                # fmin ignores NaN like the scalar min() does
+                growth_score = np.where(expected_height > 0, np.fmin(1.0, height / expected_height), 0.5)
+            
+            stress_score = np.maximum.reduce([
+                np.select([soil_moisture < 30, soil_moisture < 45], [0.8, 0.4], 0.1),
+                np.select([(temperature > 32) | (temperature < 10), (temperature > 28) | (temperature < 15)], [0.9, 0.3], 0.1),
+                np.select([(ph < 5.5) | (ph > 8.0), (ph < 6.0) | (ph > 7.5)], [0.7, 0.2], 0.1),
+            ])
+            
+            moisture_factor = np.select(
+                [(soil_moisture >= 60) & (soil_moisture <= 80),
+                 ((soil_moisture >= 40) & (soil_moisture < 60)) | ((soil_moisture > 80) & (soil_moisture <= 90))],
+                [1.0, 0.7], 0.3
+            )
+            temperature_factor = np.select(
+                [(temperature >= 18) & (temperature <= 26),
+                 ((temperature >= 15) & (temperature < 18)) | ((temperature > 26) & (temperature <= 30))],
+                [1.0, 0.7], 0.3
+            )
+            environment_score = (moisture_factor + temperature_factor) / 2
+        
+        overall_health = (growth_score + environment_score + (1 - stress_score)) / 3
+        
+        return {
+            'overall_health_score': overall_health * 100,
+            'health_status': self._classify_health_status_batch(overall_health),
+            'growth_score': growth_score * 100,
+            'stress_level': stress_score * 100,
+            'environment_score': environment_score * 100,
+            'model_version': self.model_version,
+            'timestamp': _now_iso()
+        }
+    
     def _assess_growth_rate(self, plant_data: Dict, historical_data: List[Dict]) -> float:
         """Assess plant growth rate (0-1)"""
-        # Mock growth assessment
-        days_since_planted = plant_data.get('days_since_planted', 0)
-        expected_height = days_since_planted * 0.8  # Mock expected growth
-        actual_height = plant_data.get('height', 0)
+        # Fit the trend when the history carries height measurements
+        samples = [record for record in historical_data
+                   if 'height' in record and 'days_since_planted' in record]
+        if len(samples) >= 2:
+            count = len(samples)
+            return _growth_trend_kernel(
+                np.fromiter((record['days_since_planted'] for record in samples), np.float64, count),
+                np.fromiter((record['height'] for record in samples), np.float64, count)
+            )
         
-        if expected_height > 0:
-            growth_ratio = min(1.2, actual_height / expected_height)
-            return min(1.0, growth_ratio)
-        return 0.5
+        # Mock growth assessment
+        return _growth_kernel(
+            float(plant_data.get('days_since_planted', 0)), float(plant_data.get('height', 0))
+        )
     
     def _detect_stress_indicators(self, sensor_data: Dict) -> float:
         """Detect plant stress indicators (0-1, higher = more stress)"""
-        stress_factors = []
-        
-        # Moisture stress
-        soil_moisture = sensor_data.get('soil_moisture', 50)
-        if soil_moisture < 30:
-            stress_factors.append(0.8)
-        elif soil_moisture < 45:
-            stress_factors.append(0.4)
-        
-        # Temperature stress
-        temperature = sensor_data.get('temperature', 25)
-        if temperature > 32 or temperature < 10:
-            stress_factors.append(0.9)
-        elif temperature > 28 or temperature < 15:
-            stress_factors.append(0.3)
-        
-        # pH stress
-        ph = sensor_data.get('ph', 6.8)
-        if ph < 5.5 or ph > 8.0:
-            stress_factors.append(0.7)
-        elif ph < 6.0 or ph > 7.5:
-            stress_factors.append(0.2)
-        
-        return max(stress_factors) if stress_factors else 0.1
+        return _stress_kernel(
+            float(sensor_data.get('soil_moisture', 50)),
+            float(sensor_data.get('temperature', 25)),
+            float(sensor_data.get('ph', 6.8))
+        )
     
     def _evaluate_environment(self, sensor_data: Dict) -> float:
         """Evaluate environmental conditions (0-1)"""
-        factors = []
-        
-        # Optimal ranges
-        soil_moisture = sensor_data.get('soil_moisture', 50)
-        if 60 <= soil_moisture <= 80:
-            factors.append(1.0)
-        elif 40 <= soil_moisture < 60 or 80 < soil_moisture <= 90:
-            factors.append(0.7)
-        else:
-            factors.append(0.3)
-        
-        temperature = sensor_data.get('temperature', 25)
-        if 18 <= temperature <= 26:
-            factors.append(1.0)
-        elif 15 <= temperature < 18 or 26 < temperature <= 30:
-            factors.append(0.7)
-        else:
-            factors.append(0.3)
-        
-        return sum(factors) / len(factors) if factors else 0.5
+        return _environment_kernel(
+            float(sensor_data.get('soil_moisture', 50)), float(sensor_data.get('temperature', 25))
+        )
     
     def _classify_health_status(self, health_score: float) -> str:
         """Classify health status based on score"""
-        if health_score >= 0.9:
-            return "A'lo"
-        elif health_score >= 0.75:
-            return "Yaxshi"
-        elif health_score >= 0.6:
-            return "O'rtacha"
-        elif health_score >= 0.4:
-            return "Yomon"
-        else:
-            return "Kritik"
+        if not health_score >= _HEALTH_STATUS_EDGES[0]:  # Also catches NaN
+            return _HEALTH_STATUS_LABELS[0]
+        return _HEALTH_STATUS_LABELS[bisect.bisect_right(_HEALTH_STATUS_EDGES, health_score)]
+    
+    def _classify_health_status_batch(self, health_scores) -> np.ndarray:
+        """Vectorized _classify_health_status over an array of scores"""
+        health_scores = np.asarray(health_scores)
+        index = np.digitize(health_scores, _HEALTH_STATUS_EDGES)
+        index[np.isnan(health_scores)] = 0
+        return np.asarray(_HEALTH_STATUS_LABELS, dtype=object)[index]
     
     def _generate_health_recommendations(self, growth_score: float, stress_score: float,
                                        environment_score: float, sensor_data: Dict) -> List[str]:
         """Generate health improvement recommendations"""
-        recommendations = []
-        
-        if stress_score > 0.6:
-            recommendations.append("Stress omillarini kamaytirishga e'tibor bering")
-            
-            soil_moisture = sensor_data.get('soil_moisture', 50)
-            if soil_moisture < 40:
-                recommendations.append("Sug'orish chastotasini oshiring")
-        
-        if growth_score < 0.6:
-            recommendations.append("O'simlik o'sishini stimulyatsiya qiling")
-            recommendations.append("O'g'it qo'llashni ko'rib chiqing")
-        
-        if environment_score < 0.7:
-            temperature = sensor_data.get('temperature', 25)
-            if temperature > 30:
-                recommendations.append("Haroratni kamaytirish choralarini ko'ring")
-            
-            ph = sensor_data.get('ph', 6.8)
-            if ph < 6.0 or ph > 7.5:
-                recommendations.append("Tuproq pH darajasini sozlang")
+        inputs = (
+            growth_score, stress_score, environment_score,
+            sensor_data.get('soil_moisture', 50), sensor_data.get('temperature', 25), sensor_data.get('ph', 6.8)
+        )
+        recommendations = [text for applies, text in _HEALTH_RECOMMENDATION_RULES if applies(*inputs)]
         
         if not recommendations:
             recommendations.append("O'simlik holati yaxshi, hozirgi parvarish rejimini davom eting")
@@ -374,60 +968,124 @@ class PlantHealthAnalyzer:
     
     def _identify_risk_factors(self, sensor_data: Dict, stress_score: float) -> List[Dict]:
         """Identify specific risk factors"""
-        risks = []
-        
-        if stress_score > 0.7:
-            risks.append({
-                'type': 'high_stress',
-                'severity': 'high',
-                'description': 'O\'simlik yuqori stress darajasida',
-                'action': 'Darhol choralar ko\'ring'
-            })
-        
         soil_moisture = sensor_data.get('soil_moisture', 50)
-        if soil_moisture < 25:
-            risks.append({
-                'type': 'drought_stress',
-                'severity': 'critical',
-                'description': 'Qurg\'oqchilik stressi',
-                'action': 'Darhol sug\'orish kerak'
-            })
-        
         temperature = sensor_data.get('temperature', 25)
-        if temperature > 35:
-            risks.append({
-                'type': 'heat_stress',
-                'severity': 'high',
-                'description': 'Issiqlik stressi',
-                'action': 'Soyalash yoki sovutish choralarini ko\'ring'
-            })
-        
-        return risks
+        return [
+            dict(risk) for applies, risk in _PLANT_RISK_RULES
+            if applies(stress_score, soil_moisture, temperature)
+        ]
+
+
+# Gemini analysis cache: readings are floored to these steps (default 1) so
+# near-identical states share one API call; entries expire with the
+# ANALYSIS_CACHE_TTL-second window they were made in
+ANALYSIS_CACHE_SIZE = 512
+ANALYSIS_CACHE_TTL = 300
+ANALYSIS_CACHE_STEPS = {
+    'soil_moisture': 5,
+    'air_humidity': 5,
+    'humidity': 5,
+    'ph': 0.5,
+    'conductivity': 0.5,
+    'light_intensity': 100,
+    'pressure': 5,
+    'wind_speed': 5,
+    'wind_gust': 5,
+    'cloud_coverage': 10,
+}
+
+# Readings the analyses rely on (alternative key names, plausible range);
+# each one present and in range raises _state_confidence
+CONFIDENCE_READING_RANGES = (
+    (('soil_moisture',), (0, 100)),
+    (('air_temperature', 'temperature'), (-40, 60)),
+    (('air_humidity', 'humidity'), (0, 100)),
+    (('ph',), (0, 14)),
+)
+
+GEMINI_MAX_CONCURRENCY = 8  # Gemini calls in flight per process
+
+# Shared, bounded pool for blocking Gemini calls made from async code
+_gemini_executor = ThreadPoolExecutor(max_workers=GEMINI_MAX_CONCURRENCY, thread_name_prefix='gemini')
+
+
+def _quantize_state(values: Optional[Dict]) -> Tuple:
+    """Hashable, bucketed (name, value) pairs of a readings dict for the analysis cache"""
+    items = []
+    for name, value in sorted((values or {}).items()):
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+            step = ANALYSIS_CACHE_STEPS.get(name, 1)
+            value = math.floor(value / step) * step
+        elif isinstance(value, (dict, list)):
+            value = repr(value)  # Hashable stand-in for nested values
+        items.append((name, value))
+    return tuple(items)
+
+
+def _state_confidence(sensor_data: Dict, low: float, high: float) -> float:
+    """Confidence in [low, high] by how many key readings are present and physically plausible"""
+    valid = 0
+    for names, (lower, upper) in CONFIDENCE_READING_RANGES:
+        value = next((sensor_data[name] for name in names if sensor_data.get(name) is not None), None)
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and lower <= value <= upper:
+            valid += 1  # NaN fails the range check
+    return low + (high - low) * valid / len(CONFIDENCE_READING_RANGES)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_gemini_model(api_key: str, model_name: str):
+    """Configure Gemini once per process and share the model (and its gRPC channel)"""
+    if genai is None:
+        raise ImportError("google.generativeai is not installed")
+    genai.configure(api_key=api_key, transport="grpc")
+    return genai.GenerativeModel(model_name)
 
 
 class GeminiIntegration:
     """Integration with Google Gemini AI for advanced analysis - REAL API"""
     
+    # Static prompt lookup tables, built once per process instead of per call
+    PLANT_TYPE_INFO = {
+        'tomato': 'Pomidor - issiqliksevar, yuqori suv talab qiladigan',
+        'cucumber': 'Bodring - tez o\'suvchi, ko\'p suv kerak',
+        'pepper': 'Qalampir - issiq iqlimni yaxshi ko\'radi',
+        'lettuce': 'Salat - sovuqbardosh, kam suv kerak',
+        'carrot': 'Sabzi - chuqur tuproqni yaxshi ko\'radi',
+        'potato': 'Kartoshka - o\'rtacha suv talab qiladi',
+        'cabbage': 'Karam - sovuqbardosh, ko\'p suv kerak',
+        'onion': 'Piyoz - quruqchilikka chidamli',
+        'strawberry': 'Qulupnay - yumshoq sug\'orish kerak',
+        'herbs': 'Dorivor o\'tlar - kam suv, ko\'p quyosh'
+    }
+
+    GROWTH_STAGE_INFO = {
+        'seedling': 'Ko\'chat bosqichi - juda ehtiyotli sug\'orish',
+        'vegetative': 'Vegetativ o\'sish - faol sug\'orish kerak',
+        'flowering': 'Gullash bosqichi - muntazam lekin ehtiyotli',
+        'fruiting': 'Meva berish - ko\'p suv va oziqlanish',
+        'mature': 'Pishish bosqichi - sug\'orishni kamaytiriladi'
+    }
+    
     def __init__(self):
         self.api_key = settings.GEMINI_API_KEY
         self.model_name = "gemini-1.5-flash"
         self.use_real_api = False
+        self._analysis_cache = OrderedDict()  # state key -> (prompt length, response, lowercased response)
+        self._analysis_cache_lock = threading.Lock()
         
         if not self.api_key:
             logger.error("GEMINI_API_KEY not configured in settings. Please set your Gemini API key.")
             return
         
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel(self.model_name)
+            self.model = _get_gemini_model(self.api_key, self.model_name)
             self.use_real_api = True
-            logger.info(f"✅ Gemini AI initialized successfully with model: {self.model_name}")
+            logger.info("✅ Gemini AI initialized successfully with model: %s", self.model_name)
         except ImportError as e:
-            logger.error(f"❌ Google Generative AI library not installed: {e}")
+            logger.error("❌ Google Generative AI library not installed: %s", e)
             logger.error("Install with: pip install google-generativeai")
         except Exception as e:
-            logger.error(f"❌ Failed to initialize Gemini AI: {e}")
+            logger.error("❌ Failed to initialize Gemini AI: %s", e)
             logger.error("Please check your API key and internet connection.")
         
     def analyze_comprehensive_data(self, all_sensor_data: Dict, weather_data: Dict, 
@@ -457,39 +1115,56 @@ class GeminiIntegration:
             }
         
         try:
-            # Build comprehensive analysis prompt
-            analysis_prompt = self._build_analysis_prompt(
-                all_sensor_data, weather_data, plant_data, historical_trends,
-                field_params, plant_params
+            # Near-identical readings within one TTL window reuse the cached Gemini response
+            state_key = (
+                _quantize_state(all_sensor_data),
+                _quantize_state(weather_data),
+                _quantize_state(historical_trends),
+                _quantize_state(field_params),
+                _quantize_state(plant_params),
+                int(time.time() // ANALYSIS_CACHE_TTL),
             )
+            with self._analysis_cache_lock:
+                cached = self._analysis_cache.get(state_key)
+                if cached is not None:
+                    self._analysis_cache.move_to_end(state_key)
             
-            logger.info("🚀 Calling REAL Gemini AI API for comprehensive analysis...")
+            if cached is None:
+                # The prompt always carries the actual readings; only the lookup is bucketed
+                analysis_prompt = self._build_analysis_prompt(
+                    all_sensor_data, weather_data, plant_data, historical_trends,
+                    field_params, plant_params
+                )
+                response_text = self._request_analysis(analysis_prompt)
+                cached = (len(analysis_prompt), response_text, response_text.lower())
+                with self._analysis_cache_lock:
+                    self._analysis_cache[state_key] = cached
+                    if len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+                        self._analysis_cache.popitem(last=False)
             
-            # REAL GEMINI API CALL
-            response = self.model.generate_content(analysis_prompt)
-            
-            if not response.text:
-                raise Exception("Empty response from Gemini AI")
-                
-            logger.info("✅ Received response from Gemini AI API successfully")
+            prompt_length, response_text, response_lower = cached
             
             # Parse real Gemini response
-            gemini_response = self._parse_real_gemini_response(response.text, all_sensor_data, weather_data)
+            gemini_response = self._parse_real_gemini_response(
+                response_text, all_sensor_data, weather_data, response_lower
+            )
+            
+            flags = _response_flags(response_lower)
             
             return {
                 'gemini_analysis': gemini_response,
-                'insights': self._extract_insights_from_real_response(response.text),
-                'action_plan': self._generate_action_plan_from_response(response.text),
-                'confidence_score': random.uniform(92, 98),  # Real AI is more confident
-                'analysis_timestamp': timezone.now().isoformat(),
+                'insights': self._extract_insights_from_real_response(response_text, flags),
+                'action_plan': self._generate_action_plan_from_response(response_text, flags),
+                'confidence_score': self._estimate_confidence(response_text),
+                'analysis_timestamp': _now_iso(),
                 'source': 'REAL_GEMINI_API',
                 'model': self.model_name,
-                'prompt_length': len(analysis_prompt),
-                'response_length': len(response.text)
+                'prompt_length': prompt_length,
+                'response_length': len(response_text)
             }
             
         except Exception as e:
-            logger.error(f"❌ Gemini AI API FAILED - NO FALLBACK ALLOWED: {e}")
+            logger.error("❌ Gemini AI API FAILED - NO FALLBACK ALLOWED: %s", e)
             
             # NO FALLBACK - Return error only
             return {
@@ -498,15 +1173,77 @@ class GeminiIntegration:
                 'required_action': 'Check internet connection and API key validity',
                 'confidence_score': 0,
                 'source': 'API_CALL_FAILED',
-                'analysis_timestamp': timezone.now().isoformat(),
+                'analysis_timestamp': _now_iso(),
                 'api_error_details': str(e)
             }
     
+    async def analyze_comprehensive_data_async(self, **state) -> Dict:
+        """
+        Awaitable analyze_comprehensive_data for async views and tasks
+        
+        The blocking SDK call runs in the shared Gemini pool, so the event loop
+        keeps serving while the RPC is in flight; cache hits return immediately.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()  # Keeps the request timestamp
+        return await loop.run_in_executor(
+            _gemini_executor,
+            functools.partial(context.run, self.analyze_comprehensive_data, **state)
+        )
+    
+    async def analyze_comprehensive_data_batch(self, states: List[Dict]) -> List[Dict]:
+        """
+        Analyze several management zones concurrently
+        
+        Args:
+            states (list): One dict per zone holding the keyword arguments of
+                analyze_comprehensive_data (all_sensor_data, weather_data, ...)
+            
+        Returns:
+            list: One analysis result per zone, in the order of states
+        """
+        # The pool caps concurrent calls at GEMINI_MAX_CONCURRENCY across all batches
+        return list(await asyncio.gather(
+            *(self.analyze_comprehensive_data_async(**state) for state in states)
+        ))
+    
+    def _estimate_confidence(self, response_text: str) -> float:
+        """Confidence (92-98) from how many of the requested sections the response covers"""
+        sections_found = sum(1 for marker in GEMINI_SECTION_MARKERS if marker in response_text)
+        return 92.0 + 6.0 * sections_found / len(GEMINI_SECTION_MARKERS)
+    
+    def _request_analysis(self, analysis_prompt: str) -> str:
+        """
+        Send an analysis prompt to Gemini and return the response text
+        
+        Failures raise instead of returning, so they are never cached.
+        """
+        logger.info("🚀 Calling REAL Gemini AI API for comprehensive analysis...")
+        
+        # REAL GEMINI API CALL - streamed, chunks are collected as they are generated
+        response = self.model.generate_content(analysis_prompt, stream=True)
+        response_text = ''.join(chunk.text for chunk in response)
+        
+        if not response_text:
+            raise Exception("Empty response from Gemini AI")
+            
+        logger.info("✅ Received response from Gemini AI API successfully")
+        
+        return response_text
+    
     def _build_analysis_prompt(self, sensor_data: Dict, weather_data: Dict,
                               plant_data: Dict, historical_trends: Dict, 
                               field_params: Dict = None, plant_params: Dict = None) -> str:
         """Build enhanced analysis prompt for Gemini with field and plant specifics"""
         
+        field_params = field_params or {}
+        historical_trends = historical_trends or {}
+        
+        # Har bir o'simlik uchun maydon bir marta hisoblanadi
+        area_per_plant = None
+        if plant_params and plant_params.get('plant_count', 1):
+            area_per_plant = field_params.get('field_size', 0) / plant_params.get('plant_count', 1)
+        
         # Ekin maydoni va o'simlik ma'lumotlarini qo'shish
         field_info = ""
         plant_info = ""
@@ -517,38 +1254,17 @@ class GeminiIntegration:
         - Maydon o'lchami: {field_params.get('field_size', 'N/A')} kvadrat metr
         - Maydon turi: {field_params.get('field_type', 'N/A')} 
         - Sug'orish tizimi: {field_params.get('irrigation_system', 'N/A')}
-        - Maydon zichligi: {field_params.get('field_size', 0) / plant_params.get('plant_count', 1) if plant_params else 'N/A'} m²/o'simlik
+        - Maydon zichligi: {area_per_plant if area_per_plant is not None else 'N/A'} m²/o'simlik
             """
         
         if plant_params:
-            plant_type_info = {
-                'tomato': 'Pomidor - issiqliksevar, yuqori suv talab qiladigan',
-                'cucumber': 'Bodring - tez o\'suvchi, ko\'p suv kerak',
-                'pepper': 'Qalampir - issiq iqlimni yaxshi ko\'radi',
-                'lettuce': 'Salat - sovuqbardosh, kam suv kerak',
-                'carrot': 'Sabzi - chuqur tuproqni yaxshi ko\'radi',
-                'potato': 'Kartoshka - o\'rtacha suv talab qiladi',
-                'cabbage': 'Karam - sovuqbardosh, ko\'p suv kerak',
-                'onion': 'Piyoz - quruqchilikka chidamli',
-                'strawberry': 'Qulupnay - yumshoq sug\'orish kerak',
-                'herbs': 'Dorivor o\'tlar - kam suv, ko\'p quyosh'
-            }
-            
-            growth_stage_info = {
-                'seedling': 'Ko\'chat bosqichi - juda ehtiyotli sug\'orish',
-                'vegetative': 'Vegetativ o\'sish - faol sug\'orish kerak',
-                'flowering': 'Gullash bosqichi - muntazam lekin ehtiyotli',
-                'fruiting': 'Meva berish - ko\'p suv va oziqlanish',
-                'mature': 'Pishish bosqichi - sug\'orishni kamaytiriladi'
-            }
-            
             plant_info = f"""
         O'SIMLIK MAXSUS MA'LUMOTLARI:
-        - O'simlik turi: {plant_params.get('plant_type', 'N/A')} - {plant_type_info.get(plant_params.get('plant_type', ''), 'Noma\'lum tur')}
+        - O'simlik turi: {plant_params.get('plant_type', 'N/A')} - {self.PLANT_TYPE_INFO.get(plant_params.get('plant_type', ''), 'Noma\'lum tur')}
         - O'simlik yoshi: {plant_params.get('plant_age', 'N/A')} kun
-        - O'sish bosqichi: {plant_params.get('growth_stage', 'N/A')} - {growth_stage_info.get(plant_params.get('growth_stage', ''), '')}
+        - O'sish bosqichi: {plant_params.get('growth_stage', 'N/A')} - {self.GROWTH_STAGE_INFO.get(plant_params.get('growth_stage', ''), '')}
         - O'simliklar soni: {plant_params.get('plant_count', 'N/A')} dona
-        - Har bir o'simlik uchun maydon: {field_params.get('field_size', 0) / plant_params.get('plant_count', 1):.2f} m² (agar {plant_params.get('plant_count', 0)} > 0 bo'lsa)
+        - Har bir o'simlik uchun maydon: {f'{area_per_plant:.2f}' if area_per_plant is not None else 'N/A'} m² (agar {plant_params.get('plant_count', 0)} > 0 bo'lsa)
             """
         
         prompt = f"""
@@ -640,10 +1356,11 @@ class GeminiIntegration:
         
         return prompt
     
-    def _parse_real_gemini_response(self, response_text: str, sensor_data: Dict, weather_data: Dict) -> Dict:
-        """Parse REAL Gemini AI response into structured data"""
+    def _parse_real_gemini_response(self, response_text: str, sensor_data: Dict, weather_data: Dict,
+                                    response_lower: str = None) -> Dict:
+        """Parse REAL Gemini AI response into structured data (response_lower: cached lowercase text)"""
         try:
-            logger.info(f"📝 Parsing real Gemini response ({len(response_text)} characters)")
+            logger.info("📝 Parsing real Gemini response (%s characters)", len(response_text))
             
             # Clean response text
             response_lines = response_text.split('\n')
@@ -654,14 +1371,16 @@ class GeminiIntegration:
             detailed_reasoning = response_text[:500] + "..." if len(response_text) > 500 else response_text
             
             # Look for irrigation urgency indicators in response
-            response_lower = response_text.lower()
-            if any(word in response_lower for word in ['критик', 'critical', 'urgent', 'darhol', 'зуур']):
+            if response_lower is None:
+                response_lower = response_text.lower()
+            critical_hit, high_hit, irrigation_hit, morning_hit, evening_hit = _scan_keyword_groups(response_lower)
+            if critical_hit:
                 irrigation_need = "🚨 KRITIK - Darhol sug'orish kerak"
                 irrigation_urgency = "critical"
-            elif any(word in response_lower for word in ['yuqori', 'high', 'prioritet', 'tavsiya']):
+            elif high_hit:
                 irrigation_need = "⚠️ YUQORI - Tez sug'orish tavsiya etiladi"  
                 irrigation_urgency = "high"
-            elif any(word in response_lower for word in ["sug'orish", 'irrigation', 'water']):
+            elif irrigation_hit:
                 irrigation_need = "📝 O'RTACHA - Sug'orish rejalashtiring"
                 irrigation_urgency = "moderate"
             else:
@@ -669,9 +1388,9 @@ class GeminiIntegration:
                 irrigation_urgency = "low"
             
             # Extract timing recommendations
-            if any(word in response_lower for word in ['ertalab', 'morning', '6:00', '7:00', '8:00']):
+            if morning_hit:
                 optimal_timing = "Ertalab 6:00-8:00"
-            elif any(word in response_lower for word in ['kechqurun', 'evening', '18:00', '19:00', '20:00']):
+            elif evening_hit:
                 optimal_timing = "Kechqurun 18:00-20:00"
             else:
                 optimal_timing = "Optimal vaqtni tanlang"
@@ -695,18 +1414,18 @@ class GeminiIntegration:
                 'optimal_timing': optimal_timing,
                 'irrigation_amount': water_amount,
                 'irrigation_duration': duration,
-                'irrigation_method': self._extract_method_from_response(response_text),
+                'irrigation_method': self._extract_method_from_response(response_lower),
                 'plant_health_assessment': self._extract_health_from_response(response_text, sensor_data),
-                'risk_factors': self._extract_risks_from_response(response_text),
-                'environmental_recommendations': self._extract_env_recommendations(response_text),
-                'confidence_level': random.uniform(90, 98),
+                'risk_factors': self._extract_risks_from_response(response_lower),
+                'environmental_recommendations': self._extract_env_recommendations(response_lower),
+                'confidence_level': _state_confidence(sensor_data, 90, 98),
                 'gemini_raw_response': response_text,  # Include full response
                 'response_length': len(response_text),
-                'parsing_timestamp': timezone.now().isoformat()
+                'parsing_timestamp': _now_iso()
             }
             
         except Exception as e:
-            logger.error(f"Error parsing real Gemini response - NO FALLBACK: {e}")
+            logger.error("Error parsing real Gemini response - NO FALLBACK: %s", e)
             return {
                 'error': f'GEMINI_RESPONSE_PARSE_ERROR: {str(e)}',
                 'message': 'Failed to parse Gemini AI response',
@@ -721,9 +1440,10 @@ class GeminiIntegration:
             soil_moisture = sensor_data.get('soil_moisture', 50)
             
             # Extract key information from Gemini response
-            if 'kritik' in response_text.lower() or 'critical' in response_text.lower():
+            response_lower = response_text.lower()
+            if 'kritik' in response_lower or 'critical' in response_lower:
                 irrigation_need = "KRITIK - Darhol sug'orish kerak"
-            elif 'sug\'orish' in response_text.lower() or 'irrigation' in response_text.lower():
+            elif 'sug\'orish' in response_lower or 'irrigation' in response_lower:
                 irrigation_need = "HA - Sug'orish tavsiya etiladi"
             else:
                 irrigation_need = "AI tahlil natijasi"
@@ -740,10 +1460,10 @@ class GeminiIntegration:
                     "Mulch (qoplama) qo'llash",
                     "Datchiklar holatini tekshirish"
                 ],
-                'confidence_level': random.uniform(85, 95)
+                'confidence_level': _state_confidence(sensor_data, 85, 95)
             }
         except Exception as e:
-            logger.error(f"Error parsing Gemini response: {e}")
+            logger.error("Error parsing Gemini response: %s", e)
             return self._mock_gemini_analysis(sensor_data, weather_data)
 
     def _mock_gemini_analysis(self, sensor_data: Dict, weather_data: Dict) -> Dict:
@@ -758,27 +1478,11 @@ class GeminiIntegration:
         uv_index = weather_data.get('uv_index', 5)
         air_quality = weather_data.get('air_quality_index', 2)
         
-        # Determine irrigation need with detailed analysis
-        if soil_moisture < 25:
-            irrigation_need = "🚨 KRITIK - Darhol sug'orish zarur"
-            irrigation_amount = "400-500ml har bir o'simlik uchun"
-            irrigation_duration = "20-25 daqiqa"
-            health_score = 30
-        elif soil_moisture < 40:
-            irrigation_need = "⚠️ YUQORI - 2-4 soat ichida sug'orish"
-            irrigation_amount = "300-400ml har bir o'simlik uchun" 
-            irrigation_duration = "15-20 daqiqa"
-            health_score = 60
-        elif soil_moisture < 55:
-            irrigation_need = "📝 O'RTACHA - 6-12 soat ichida rejalash"
-            irrigation_amount = "200-300ml har bir o'simlik uchun"
-            irrigation_duration = "10-15 daqiqa"
-            health_score = 80
-        else:
-            irrigation_need = "✅ YAXSHI - Sug'orish kerak emas"
-            irrigation_amount = "Kerak emas yoki 100ml profilaktika uchun"
-            irrigation_duration = "5 daqiqa yengil namlash"
-            health_score = 95
+        # Determine irrigation need with detailed analysis (NaN lands in the last tier)
+        irrigation_need, irrigation_amount, irrigation_duration, health_score = \
+            _MOCK_ANALYSIS_PLANS[bisect.bisect_right(_DURATION_EDGES, soil_moisture)]
+        
+        stress_indicators, risk_factors, alerts = self._evaluate_conditions(soil_moisture, temperature)
         
         # Advanced reasoning
         reasoning = f"""
@@ -809,15 +1513,15 @@ class GeminiIntegration:
             'plant_health_assessment': {
                 'overall_score': health_score,
                 'status': self._get_health_status(health_score),
-                'stress_indicators': self._identify_stress_indicators(sensor_data, weather_data),
-                'growth_prediction': self._predict_growth(health_score, sensor_data)
+                'stress_indicators': stress_indicators,
+                'growth_prediction': self._predict_growth(health_score)
             },
-            'risk_factors': self._analyze_risk_factors(sensor_data, weather_data),
-            'environmental_optimization': self._environmental_recommendations(sensor_data, weather_data),
-            'resource_efficiency': self._efficiency_recommendations(sensor_data, weather_data),
-            'alerts_and_warnings': self._generate_alerts(sensor_data, weather_data),
+            'risk_factors': risk_factors,
+            'environmental_optimization': self._environmental_recommendations(),
+            'resource_efficiency': self._efficiency_recommendations(),
+            'alerts_and_warnings': alerts,
             'next_check_time': self._calculate_next_check(soil_moisture),
-            'confidence_level': random.uniform(92, 98)
+            'confidence_level': _state_confidence(sensor_data, 92, 98)
         }
     
     def _generate_detailed_reasoning(self, soil_moisture, temperature, air_humidity, ph, wind_speed):
@@ -856,63 +1560,39 @@ class GeminiIntegration:
     
     def _get_optimal_timing_detailed(self, temperature, wind_speed, uv_index):
         """Get detailed optimal timing recommendations"""
-        current_hour = timezone.now().hour
-        
-        timing_info = {
-            'best_times': ["06:00-08:00 (Ertalab)", "18:00-20:00 (Kechqurun)"],
-            'avoid_times': ["11:00-16:00 (Kunduzi)"],
-            'current_status': '',
-            'next_optimal': '',
-            'reasoning': ''
-        }
-        
-        if 6 <= current_hour <= 8:
-            timing_info['current_status'] = "✅ HOZIR OPTIMAL VAQT"
-            timing_info['reasoning'] = "Ertalab - bug'lanish minimal, o'simliklar faol"
-        elif 18 <= current_hour <= 20:
-            timing_info['current_status'] = "✅ HOZIR OPTIMAL VAQT" 
-            timing_info['reasoning'] = "Kechqurun - harorat pasaygan, tunu davomida namlash"
-        elif 11 <= current_hour <= 16:
-            timing_info['current_status'] = "❌ HOZIR NOTO'G'RI VAQT"
-            timing_info['reasoning'] = f"Kunduzi sug'orish: {80 + wind_speed*2}% suv yo'qoladi"
-            timing_info['next_optimal'] = "Kechqurun 18:00 dan keyin"
-        else:
-            timing_info['current_status'] = "⚡ FAVQULODDA HOLATLARDA MUMKIN"
-            timing_info['reasoning'] = "Qabul qilinadigan vaqt, lekin optimal emas"
+        current_hour = _local_hour()
+        timing_info = _DETAILED_TIMING_BY_HOUR[current_hour]
         
+        if 11 <= current_hour <= 16:
+            # Only the midday reasoning depends on the readings
+            return {**timing_info, 'reasoning': f"Kunduzi sug'orish: {80 + wind_speed*2}% suv yo'qoladi"}
         return timing_info
     
     def _get_health_status(self, score):
-        """Convert health score to status"""
-        if score >= 90: return "A'lo - 90%+"
-        elif score >= 75: return "Yaxshi - 75-89%"
-        elif score >= 60: return "O'rtacha - 60-74%"
-        elif score >= 40: return "Yomon - 40-59%"
-        else: return "Kritik - 40% dan past"
+        """Convert health score to a status code (index into _HEALTH_PERCENT_LABELS)"""
+        if not score >= _HEALTH_PERCENT_EDGES[0]:  # Also catches NaN
+            return 0
+        return bisect.bisect_right(_HEALTH_PERCENT_EDGES, score)
     
-    def _identify_stress_indicators(self, sensor_data, weather_data):
-        """Identify plant stress indicators"""
-        indicators = []
-        
-        soil_moisture = sensor_data.get('soil_moisture', 50)
-        temperature = sensor_data.get('air_temperature', 25)
+    def _evaluate_conditions(self, soil_moisture, temperature):
+        """Stress indicators, risk factors and alerts from one pass over the condition tiers"""
+        moisture = _MOISTURE_CONDITIONS[bisect.bisect_right(_MOISTURE_CONDITION_EDGES, soil_moisture)]
+        heat = _TEMPERATURE_CONDITIONS[bisect.bisect_left(_TEMPERATURE_CONDITION_EDGES, temperature)]
         
-        if soil_moisture < 25:
-            indicators.append("🚨 Qurg'oqchilik stressi - darhol harakat kerak")
-        elif soil_moisture < 40:
-            indicators.append("⚠️ Engil suv tanqisligi")
-            
-        if temperature > 32:
-            indicators.append("🔥 Issiqlik stressi - soyalash kerak")
-        elif temperature > 28:
-            indicators.append("🌡️ Yuqori harorat stressi")
+        indicators = list(moisture[0] + heat[0]) or ["✅ Stress belgilari aniqlanmadi"]
+        risks = {
+            'immediate': [],
+            'short_term': [],
+            'preventive': []
+        }
+        for bucket, risk in moisture[1] + heat[1]:
+            risks[bucket].append(risk)
+        risks['preventive'].extend(_PREVENTIVE_RISK_ADVICE)
+        alerts = list(moisture[2] + heat[2])
         
-        if not indicators:
-            indicators.append("✅ Stress belgilari aniqlanmadi")
-            
-        return indicators
+        return indicators, risks, alerts
     
-    def _predict_growth(self, health_score, sensor_data):
+    def _predict_growth(self, health_score):
         """Predict plant growth based on current conditions"""
         if health_score >= 80:
             return "📈 Yaxshi o'sish prognozi - normal rivojlanish"
@@ -921,109 +1601,20 @@ class GeminiIntegration:
         else:
             return "📉 Sekin o'sish - choralar kerak"
     
-    def _analyze_risk_factors(self, sensor_data, weather_data):
-        """Analyze current and potential risk factors"""
-        risks = {
-            'immediate': [],
-            'short_term': [],
-            'preventive': []
-        }
-        
-        soil_moisture = sensor_data.get('soil_moisture', 50)
-        temperature = sensor_data.get('air_temperature', 25)
-        
-        if soil_moisture < 20:
-            risks['immediate'].append("Kritik qurg'oqchilik - o'simlik nobud bo'lish xavfi")
-        elif soil_moisture < 35:
-            risks['short_term'].append("Suv tanqisligi - 24 soat ichida choralar ko'ring")
-            
-        if temperature > 35:
-            risks['immediate'].append("Haddan tashqari issiqlik - zudlik bilan soyalash")
-        
-        risks['preventive'].append("Mulch qo'llash - suv tejash va ildiz himoyasi")
-        risks['preventive'].append("Muntazam monitoring - problem oldini olish")
-        
-        return risks
-    
-    def _environmental_recommendations(self, sensor_data, weather_data):
+    def _environmental_recommendations(self):
         """Environmental optimization recommendations"""
-        return {
-            'microclimate': [
-                "Soyalash to'rlari o'rnatish (UV himoyasi)",
-                "Shamol to'siq o'simliklarini ekish",
-                "Mulch bilan tuproq qoplash"
-            ],
-            'air_circulation': [
-                "Yetarli o'simliklar orasidagi masofa",
-                "Havo aylanishini yaxshilash",
-                "Zichlik muammolarini hal qilish"
-            ],
-            'soil_improvement': [
-                "Organik moddalar qo'shish",
-                "Drenaj tizimini yaxshilash",
-                "pH darajasini sozlash"
-            ]
-        }
+        return _ENVIRONMENTAL_RECOMMENDATIONS
     
-    def _efficiency_recommendations(self, sensor_data, weather_data):
+    def _efficiency_recommendations(self):
         """Resource efficiency recommendations"""
         return {
-            'water_saving': [
-                f"Mulch orqali {random.randint(15,25)}% suv tejash",
-                "Tomchilatib sug'orish tizimi",
-                "Optimal vaqtlarda sug'orish"
-            ],
-            'energy_saving': [
-                "Quyosh energiyasi dari pompalari",
-                "Smart timer'lar ishlatish",
-                "Sensor asosida avtomatlashtirish"
-            ],
-            'technology_upgrades': [
-                "IoT datchiklar qo'shimcha o'rnatish",
-                "Weather station integratsiyasi",
-                "AI bashorat tizimini kengaytirish"
-            ]
+            'water_saving': (f"Mulch orqali {random.randint(15,25)}% suv tejash",) + _WATER_SAVING_TIPS,
+            **_EFFICIENCY_RECOMMENDATIONS
         }
     
-    def _generate_alerts(self, sensor_data, weather_data):
-        """Generate alerts and warnings"""
-        alerts = []
-        
-        soil_moisture = sensor_data.get('soil_moisture', 50)
-        temperature = sensor_data.get('air_temperature', 25)
-        
-        if soil_moisture < 20:
-            alerts.append({
-                'level': 'CRITICAL',
-                'message': 'O\'simlik hayotiga xavf - darhol sug\'orish',
-                'action': 'Zudlik bilan choralar ko\'ring'
-            })
-        elif soil_moisture < 30:
-            alerts.append({
-                'level': 'WARNING', 
-                'message': 'Tuproq namligi past - nazorat qiling',
-                'action': '4 soat ichida sug\'orish rejalashtiring'
-            })
-            
-        if temperature > 35:
-            alerts.append({
-                'level': 'CRITICAL',
-                'message': 'Haddan tashqari issiqlik',
-                'action': 'Soyalash va sovutish choralari'
-            })
-        
-        return alerts
-    
     def _calculate_next_check(self, soil_moisture):
         """Calculate when to check sensors next"""
-        if soil_moisture < 25:
-            return "1 soat ichida"
-        elif soil_moisture < 40:
-            return "3 soat ichida" 
-        elif soil_moisture < 55:
-            return "6 soat ichida"
-        else:
-            return "12 soat ichida"
+        return _NEXT_CHECK_LABELS[bisect.bisect_right(_DURATION_EDGES, soil_moisture)]
     
     def _extract_insights(self, gemini_response: Dict) -> List[Dict]:
         """Extract key insights from Gemini response"""
@@ -1071,9 +1662,8 @@ class GeminiIntegration:
         
         return actions
     
-    def _extract_method_from_response(self, response_text: str) -> str:
-        """Extract irrigation method from Gemini response"""
-        response_lower = response_text.lower()
+    def _extract_method_from_response(self, response_lower: str) -> str:
+        """Extract irrigation method from lowercased Gemini response"""
         if 'tomchi' in response_lower or 'drip' in response_lower:
             return "Tomchilatib sug'orish - optimal suv tejash"
         elif 'purkagich' in response_lower or 'sprinkler' in response_lower:
@@ -1086,24 +1676,24 @@ class GeminiIntegration:
         soil_moisture = sensor_data.get('soil_moisture', 50)
         if soil_moisture < 25:
             health_score = random.randint(30, 50)
-            status = "Yomon - suv tanqisligi"
+            status_text = "Yomon - suv tanqisligi"
         elif soil_moisture < 40:
             health_score = random.randint(60, 75)
-            status = "O'rtacha - nazorat kerak"
+            status_text = "O'rtacha - nazorat kerak"
         else:
             health_score = random.randint(80, 95)
-            status = "Yaxshi holatda"
+            status_text = "Yaxshi holatda"
             
         return {
             'overall_score': health_score,
-            'status': status,
+            'status': self._get_health_status(health_score),  # Same bucket code as the mock analysis
+            'status_text': status_text,
             'gemini_assessment': response_text[:100] + "..." if len(response_text) > 100 else response_text
         }
     
-    def _extract_risks_from_response(self, response_text: str) -> List[str]:
-        """Extract risk factors from Gemini response"""
+    def _extract_risks_from_response(self, response_lower: str) -> List[str]:
+        """Extract risk factors from lowercased Gemini response"""
         risks = []
-        response_lower = response_text.lower()
         
         if any(word in response_lower for word in ['kritik', 'critical', 'urgent']):
             risks.append("🚨 Kritik suv tanqisligi")
@@ -1114,10 +1704,9 @@ class GeminiIntegration:
             
         return risks if risks else ["Hech qanday kritik xavf aniqlanmadi"]
     
-    def _extract_env_recommendations(self, response_text: str) -> List[str]:
-        """Extract environmental recommendations from Gemini response"""
+    def _extract_env_recommendations(self, response_lower: str) -> List[str]:
+        """Extract environmental recommendations from lowercased Gemini response"""
         recommendations = []
-        response_lower = response_text.lower()
         
         if 'mulch' in response_lower:
             recommendations.append("Mulch qo'llash - suv tejash")
@@ -1128,8 +1717,8 @@ class GeminiIntegration:
             
         return recommendations if recommendations else ["Hozirgi muhit yetarli"]
     
-    def _extract_insights_from_real_response(self, response_text: str) -> List[Dict]:
-        """Extract insights from real Gemini response"""
+    def _extract_insights_from_real_response(self, response_text: str, flags: int) -> List[Dict]:
+        """Extract insights from real Gemini response (flags: _response_flags bits)"""
         insights = []
         
         if len(response_text) > 100:  # Good detailed response
@@ -1140,7 +1729,7 @@ class GeminiIntegration:
                 'priority': 'high'
             })
         
-        if 'kritik' in response_text.lower() or 'critical' in response_text.lower():
+        if flags & _RESPONSE_CRITICAL:
             insights.append({
                 'type': 'urgent_action',
                 'title': 'Zudlik bilan harakat kerak',
@@ -1150,11 +1739,11 @@ class GeminiIntegration:
         
         return insights
     
-    def _generate_action_plan_from_response(self, response_text: str) -> List[Dict]:
-        """Generate action plan from Gemini response"""
+    def _generate_action_plan_from_response(self, response_text: str, flags: int) -> List[Dict]:
+        """Generate action plan from Gemini response (flags: _response_flags bits)"""
         actions = []
         
-        if any(word in response_text.lower() for word in ['kritik', 'critical', 'urgent']):
+        if flags & (_RESPONSE_CRITICAL | _RESPONSE_URGENT):
             actions.append({
                 'action': 'immediate_irrigation',
                 'priority': 1,
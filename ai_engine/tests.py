@@ -0,0 +1,303 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+import numpy as np
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import predictors
+from .models import AILearningData, AIModel, AIPrediction
+from .predictors import GeminiIntegration, IrrigationPredictor, PlantHealthAnalyzer, _state_confidence
+
+
+# Readings around every tier boundary of the scoring kernels, plus NaN (a failed sensor)
+SOIL_MOISTURE = [5, 20, 29.9, 30, 44.9, 45, 50, 59.9, 60, 75, 80, 85, 90, 95, float('nan')]
+AIR_HUMIDITY = [20, 35, 50, 65, float('nan'), 80, 90, 20, 35, 50, 65, 70, 80, 90, 60]
+
+
+class IrrigationBatchTests(SimpleTestCase):
+    """predict_irrigation_need_batch must agree with predict_irrigation_need zone by zone"""
+
+    def setUp(self):
+        self.predictor = IrrigationPredictor()
+        count = len(SOIL_MOISTURE)
+        self.soil_moisture = np.array(SOIL_MOISTURE)
+        self.air_humidity = np.array(AIR_HUMIDITY)
+        self.temperature = np.linspace(8, 38, count)
+        self.rainfall = np.linspace(0, 12, count)
+
+    def assert_matches_scalar(self, batch):
+        for index in range(len(SOIL_MOISTURE)):
+            scalar = self.predictor.predict_irrigation_need(
+                {
+                    'soil_moisture': self.soil_moisture[index],
+                    'air_humidity': self.air_humidity[index],
+                    'temperature': self.temperature[index],
+                },
+                {'rainfall_forecast': self.rainfall[index]},
+                {},
+                include_reasoning=False
+            )
+            with self.subTest(zone=index):
+                self.assertEqual(bool(batch['need_irrigation'][index]), scalar['need_irrigation'])
+                self.assertAlmostEqual(batch['irrigation_score'][index], scalar['irrigation_score'], places=3)
+                self.assertAlmostEqual(batch['confidence_score'][index], scalar['confidence_score'], places=1)
+                self.assertEqual(batch['recommendation'][index], scalar['recommendation'])
+                self.assertEqual(batch['predicted_duration_minutes'][index], scalar['predicted_duration_minutes'])
+                self.assertEqual(batch['water_amount_ml'][index], scalar['water_amount_ml'])
+
+    def predict_batch(self):
+        return self.predictor.predict_irrigation_need_batch(
+            self.soil_moisture, self.air_humidity, self.temperature, self.rainfall
+        )
+
+    def test_numpy_path_matches_scalar(self):
+        with mock.patch.object(predictors, '_NUMBA_AVAILABLE', False):
+            self.assert_matches_scalar(self.predict_batch())
+
+    def test_default_path_matches_scalar(self):
+        self.assert_matches_scalar(self.predict_batch())
+
+
+class PlantHealthBatchTests(SimpleTestCase):
+    """analyze_plant_health_batch must agree with analyze_plant_health plant by plant"""
+
+    def setUp(self):
+        self.analyzer = PlantHealthAnalyzer()
+        count = len(SOIL_MOISTURE)
+        self.soil_moisture = np.array(SOIL_MOISTURE)
+        self.temperature = np.linspace(5, 36, count)
+        self.ph = np.linspace(5.0, 8.5, count)
+        self.days_since_planted = np.linspace(0, 120, count)
+        self.height = np.linspace(0, 110, count)
+
+    def assert_matches_scalar(self, batch):
+        for index in range(len(SOIL_MOISTURE)):
+            scalar = self.analyzer.analyze_plant_health(
+                {
+                    'soil_moisture': self.soil_moisture[index],
+                    'temperature': self.temperature[index],
+                    'ph': self.ph[index],
+                },
+                {'days_since_planted': self.days_since_planted[index], 'height': self.height[index]},
+                []
+            )
+            with self.subTest(plant=index):
+                self.assertEqual(batch['health_status'][index], scalar['health_status'])
+                for field in ('overall_health_score', 'growth_score', 'stress_level', 'environment_score'):
+                    self.assertAlmostEqual(batch[field][index], scalar[field], places=1)
+
+    def analyze_batch(self):
+        return self.analyzer.analyze_plant_health_batch(
+            self.soil_moisture, self.temperature, self.ph, self.days_since_planted, self.height
+        )
+
+    def test_numpy_path_matches_scalar(self):
+        with mock.patch.object(predictors, '_NUMBA_AVAILABLE', False):
+            self.assert_matches_scalar(self.analyze_batch())
+
+    def test_default_path_matches_scalar(self):
+        self.assert_matches_scalar(self.analyze_batch())
+
+
+class StateConfidenceTests(SimpleTestCase):
+
+    def test_scales_with_valid_readings(self):
+        self.assertEqual(_state_confidence({}, 90, 98), 90)
+        self.assertEqual(_state_confidence(
+            {'soil_moisture': 40, 'temperature': 25, 'air_humidity': 60, 'ph': 6.5}, 90, 98
+        ), 98)
+
+    def test_ignores_missing_nan_and_out_of_range_readings(self):
+        self.assertEqual(_state_confidence(
+            {'soil_moisture': float('nan'), 'air_temperature': 25, 'humidity': 140, 'ph': None}, 90, 98
+        ), 92)
+
+
+class _FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeModel:
+    """Stands in for the Gemini model and records the prompts it receives"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        return [_FakeChunk('🚨 Sug\'orish kerak. ⏰ Ertalab 6:00-8:00')]
+
+
+@override_settings(GEMINI_API_KEY='')
+class GeminiAnalysisCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.gemini = GeminiIntegration()
+        self.gemini.model = _FakeModel()
+        self.gemini.use_real_api = True
+
+    def analyze(self, soil_moisture):
+        return self.gemini.analyze_comprehensive_data(
+            {'soil_moisture': soil_moisture, 'air_temperature': 27.4}, {'temperature': 30}, {}, {}
+        )
+
+    def test_near_identical_readings_share_one_call(self):
+        first = self.analyze(23.7)
+        second = self.analyze(24.1)
+
+        self.assertEqual(len(self.gemini.model.prompts), 1)
+        self.assertEqual(first['gemini_analysis']['gemini_raw_response'],
+                         second['gemini_analysis']['gemini_raw_response'])
+
+    def test_prompt_carries_actual_readings(self):
+        self.analyze(23.7)
+
+        self.assertIn('23.7', self.gemini.model.prompts[0])
+
+    def test_failures_are_not_cached(self):
+        with mock.patch.object(self.gemini.model, 'generate_content', side_effect=RuntimeError('offline')):
+            self.assertEqual(self.analyze(23.7)['source'], 'API_CALL_FAILED')
+
+        self.assertNotIn('error', self.analyze(23.7))
+        self.assertEqual(len(self.gemini.model.prompts), 1)
+
+
+@override_settings(GEMINI_API_KEY='', TIME_ZONE='Asia/Tashkent')
+class DetailedTimingTests(SimpleTestCase):
+
+    def setUp(self):
+        self.gemini = GeminiIntegration()
+        # _local_hour caches the hour; start and end each test without it
+        predictors._local_hour_state = (0.0, 0)
+        self.addCleanup(setattr, predictors, '_local_hour_state', (0.0, 0))
+
+    def test_follows_the_local_hour(self):
+        # 02:00 UTC is 07:00 in Tashkent, inside the morning watering window
+        utc_now = datetime(2024, 6, 1, 2, 0, tzinfo=dt_timezone.utc)
+        with mock.patch.object(timezone, 'now', return_value=utc_now):
+            detailed = self.gemini._get_optimal_timing_detailed(25, 5, 5)
+            timing = IrrigationPredictor()._calculate_optimal_timing({}, 25)
+
+        self.assertEqual(detailed, predictors._DETAILED_TIMING_BY_HOUR[7])
+        self.assertEqual(timing, predictors._TIMING_BY_HOUR[7])
+
+
+@override_settings(GEMINI_API_KEY='')
+class HealthStatusCodeTests(SimpleTestCase):
+
+    def setUp(self):
+        self.gemini = GeminiIntegration()
+
+    def test_live_and_mock_analysis_send_the_same_status_code(self):
+        sensor_data = {'soil_moisture': 20, 'air_temperature': 30}
+        live = self.gemini._extract_health_from_response('Javob', sensor_data)
+        mocked = self.gemini._mock_gemini_analysis(sensor_data, {})['plant_health_assessment']
+
+        for assessment in (live, mocked):
+            with self.subTest(assessment=assessment):
+                self.assertIsInstance(assessment['status'], int)
+                self.assertEqual(assessment['status'], self.gemini._get_health_status(assessment['overall_score']))
+        self.assertEqual(live['status_text'], 'Yomon - suv tanqisligi')
+
+
+def _ingest_predictions(model, scores, start=0):
+    """Insert predictions of a model, one second apart from `start` seconds on, in the order of scores"""
+    predictions = AIPrediction.objects.ingest(
+        {
+            'model': model, 'prediction_type': 'irrigation_need', 'input_data': {},
+            'prediction_value': 1, 'confidence_score': score, 'confidence_level': 'high',
+            'recommendation': 'Sug\'orish'
+        }
+        for score in scores
+    )
+    base = datetime(2024, 6, 1, tzinfo=dt_timezone.utc)
+    for offset, prediction in enumerate(predictions, start):
+        prediction.created_at = base + timedelta(seconds=offset)
+    AIPrediction.objects.bulk_save(predictions, ['created_at'])
+    return predictions
+
+
+class BulkIngestManagerTests(TestCase):
+
+    def test_ingest_inserts_all_rows_in_batches(self):
+        rows = AILearningData.objects.ingest(
+            ({'source_type': 'sensors', 'data_point': {'soil_moisture': value}} for value in (10, 20, 30)),
+            batch_size=2
+        )
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            sorted(AILearningData.objects.values_list('data_point__soil_moisture', flat=True)), [10, 20, 30]
+        )
+
+    def test_bulk_save_updates_changed_fields(self):
+        rows = AILearningData.objects.ingest(
+            {'source_type': 'sensors', 'data_point': {'soil_moisture': value}} for value in (10, 20, 30)
+        )
+        for row in rows:
+            row.used_for_training = True
+        AILearningData.objects.bulk_save(rows, ['used_for_training'])
+
+        self.assertEqual(AILearningData.objects.filter(used_for_training=True).count(), 3)
+
+
+class RecentWithModelTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        _ingest_predictions(AIModel.objects.create(name='Irrigation', model_type='irrigation_predictor'), [50, 60])
+        _ingest_predictions(AIModel.objects.create(name='Health', model_type='plant_health'), [70, 80], start=10)
+
+    def test_newest_first_with_model_in_the_same_query(self):
+        with self.assertNumQueries(1):
+            recent = [
+                (prediction.confidence_score, prediction.model.name)
+                for prediction in AIPrediction.objects.recent_with_model(limit=3)
+            ]
+
+        self.assertEqual(recent, [(80, 'Health'), (70, 'Health'), (60, 'Irrigation')])
+
+
+class RecentStatsByModelTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first_model = AIModel.objects.create(name='Irrigation', model_type='irrigation_predictor')
+        cls.second_model = AIModel.objects.create(name='Health', model_type='plant_health')
+        cls.idle_model = AIModel.objects.create(name='Weather', model_type='weather_analyzer')
+        _ingest_predictions(cls.first_model, range(10, 70, 5))  # 12 predictions, newest scores highest
+        _ingest_predictions(cls.second_model, [80, 80, 80], start=100)
+
+    def test_counts_latest_predictions_and_averages_a_sample(self):
+        with self.assertNumQueries(1):
+            stats = AIPrediction.objects.recent_stats_by_model(
+                [self.first_model, self.second_model, self.idle_model], limit=10, sample=4
+            )
+
+        # Latest 10 of the first model's 12 counted; mean confidence of its latest 4 (65, 60, 55, 50)
+        self.assertEqual(stats[self.first_model.id], (10, 57.5))
+        self.assertEqual(stats[self.second_model.id], (3, 80))
+        self.assertNotIn(self.idle_model.id, stats)
+
+
+class CheckConstraintTests(TestCase):
+
+    def assert_rejected(self, model_class, **fields):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            model_class.objects.create(**fields)
+
+    def test_score_and_rating_ranges_are_enforced(self):
+        ai_model = AIModel.objects.create(name='Irrigation', model_type='irrigation_predictor')
+        prediction = {
+            'model': ai_model, 'prediction_type': 'irrigation_need', 'input_data': {},
+            'prediction_value': 1, 'confidence_score': 50, 'confidence_level': 'high', 'recommendation': ''
+        }
+
+        self.assert_rejected(AIModel, name='Broken', model_type='plant_health', accuracy=101)
+        self.assert_rejected(AIPrediction, **{**prediction, 'confidence_score': 150})
+        self.assert_rejected(AIPrediction, **{**prediction, 'feedback_score': 6})
+        self.assert_rejected(AILearningData, source_type='sensors', data_point={}, quality_score=1.5)
+        AIPrediction.objects.create(**prediction)
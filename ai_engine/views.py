@@ -1,69 +1,127 @@
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Q, Subquery
 from django.utils import timezone
 from datetime import timedelta
 import uuid
 import logging
+import numpy as np
 
-from .models import AIModel, AIPrediction, AIAnalysisSession, AIInsight
+from .models import (
+    AIModel, AIPrediction, AIAnalysisSession, AIInsight, JSONArrayLength,
+    IMPORTANCE_LEVEL_LABELS, INSIGHT_TYPE_LABELS, MODEL_TYPE_LABELS, SESSION_STATUS_LABELS, SESSION_TYPE_LABELS
+)
 from .predictors import irrigation_predictor, plant_health_analyzer, gemini_integration
 from sensor.models import Sensor, SensorReading, WeatherData
 from plant.models import Plant
 
 logger = logging.getLogger(__name__)
 
+# Plant counts and the latest weather change slowly; reuse them for this many seconds
+AGGREGATE_CACHE_TIMEOUT = 30
+# Back-to-back analysis calls (irrigation, health, comprehensive) share one sensor snapshot
+SENSOR_SNAPSHOT_CACHE_TIMEOUT = 5
+
+
+# Mock weather ranges used while no WeatherData row exists, drawn in one call
+_MOCK_WEATHER_FIELDS = (
+    'temperature', 'humidity', 'rainfall', 'wind_speed',
+    'feels_like_temperature', 'uv_index', 'pressure', 'wind_gust'
+)
+_MOCK_WEATHER_LOW = np.array([20, 40, 0, 5, 18, 1, 1010, 10], dtype=float)
+_MOCK_WEATHER_HIGH = np.array([32, 75, 10, 20, 35, 11, 1025, 30], dtype=float)
+_MOCK_WEATHER_CONDITIONS = ('Clear', 'Partly Cloudy', 'Cloudy', 'Rain')
+_mock_rng = np.random.default_rng()
+
+
+def _mock_weather():
+    """Random weather readings (plain Python numbers) for when no WeatherData row exists"""
+    weather = dict(zip(_MOCK_WEATHER_FIELDS, _mock_rng.uniform(_MOCK_WEATHER_LOW, _MOCK_WEATHER_HIGH).tolist()))
+    rain_draw, gust_draw = _mock_rng.random(2)
+    if rain_draw >= 0.3:  # Rain in 30% of mock forecasts
+        weather['rainfall'] = 0
+    if gust_draw >= 0.5:
+        weather['wind_gust'] = None
+    air_quality_index, cloud_coverage, condition = _mock_rng.integers([1, 0, 0], [6, 101, 4]).tolist()
+    weather['air_quality_index'] = air_quality_index
+    weather['cloud_coverage'] = cloud_coverage
+    weather['weather_condition'] = _MOCK_WEATHER_CONDITIONS[condition]
+    return weather
+
+
+def _plant_summary():
+    """Plant totals by health group (one aggregate query, cached briefly)"""
+    return cache.get_or_set('ai_engine:plant_summary', lambda: Plant.objects.aggregate(
+        total=Count('id'),
+        healthy=Count('id', filter=Q(health_status__in=['excellent', 'good'])),
+        attention=Count('id', filter=Q(health_status__in=['fair', 'poor', 'critical']))
+    ), AGGREGATE_CACHE_TIMEOUT)
+
+
+def _latest_weather():
+    """Most recent WeatherData row or None (cached briefly)"""
+    return cache.get_or_set('ai_engine:latest_weather', WeatherData.objects.first, AGGREGATE_CACHE_TIMEOUT)
+
+
+def _weather_snapshot():
+    """Weather inputs for the analyses: the latest WeatherData row, or mock values if there is none"""
+    latest_weather = _latest_weather()
+    if not latest_weather:
+        return _mock_weather()
+    return {
+        'temperature': latest_weather.temperature,
+        'humidity': latest_weather.humidity,
+        'rainfall': latest_weather.rainfall,
+        'wind_speed': latest_weather.wind_speed,
+        'weather_condition': latest_weather.weather_condition,
+        'feels_like_temperature': latest_weather.feels_like_temperature,
+        'uv_index': latest_weather.uv_index,
+        'air_quality_index': latest_weather.air_quality_index,
+        'pressure': latest_weather.pressure,
+        'wind_gust': latest_weather.wind_gust,
+        'cloud_coverage': latest_weather.cloud_coverage
+    }
+
+
+def _collect_sensor_snapshot():
+    """Latest stored reading per active sensor, keyed like 'soil_moisture' (cached briefly)"""
+    return cache.get_or_set('ai_engine:sensor_snapshot', _query_sensor_snapshot, SENSOR_SNAPSHOT_CACHE_TIMEOUT)
+
+
+def _query_sensor_snapshot():
+    """Latest stored reading per active sensor (one read-only query)"""
+    latest_value = SensorReading.objects.filter(
+        sensor=OuterRef('pk')
+    ).order_by('-timestamp').values('value')[:1]
+    rows = Sensor.objects.filter(status='active').annotate(
+        latest_value=Subquery(latest_value)
+    ).values_list('sensor_type__name', 'latest_value')
+    return {
+        type_name.lower().replace(' ', '_'): value
+        for type_name, value in rows
+        if value is not None
+    }
+
 
 @api_view(['POST'])
 def analyze_irrigation_need(request):
     """Analyze irrigation need using AI"""
     try:
-        # Generate FRESH sensor data for analysis
-        sensors_data = {}
-        
-        # Collect data from all active sensors - generate new readings
-        sensors = Sensor.objects.filter(status='active')
-        for sensor in sensors:
-            # Generate new random reading for fresh AI analysis
-            fresh_reading = SensorReading.generate_random_reading(sensor)
-            sensor_key = sensor.sensor_type.name.lower().replace(' ', '_')
-            sensors_data[sensor_key] = fresh_reading.value
-        
-        # Get or generate fresh weather data
-        latest_weather = WeatherData.objects.first()
-        weather_data = {}
-        if latest_weather:
-            weather_data = {
-                'temperature': latest_weather.temperature,
-                'humidity': latest_weather.humidity,
-                'rainfall_forecast': latest_weather.rainfall,
-                'wind_speed': latest_weather.wind_speed,
-                'pressure': latest_weather.pressure,
-                'feels_like_temperature': latest_weather.feels_like_temperature,
-                'uv_index': latest_weather.uv_index,
-                'air_quality_index': latest_weather.air_quality_index,
-                'wind_gust': latest_weather.wind_gust
-            }
-        else:
-            # Generate mock weather data if none exists
-            import random
-            weather_data = {
-                'temperature': random.uniform(20, 32),
-                'humidity': random.uniform(40, 75),
-                'rainfall_forecast': random.uniform(0, 10) if random.random() < 0.3 else 0,
-                'wind_speed': random.uniform(5, 20),
-                'pressure': random.uniform(1010, 1025),
-                'feels_like_temperature': random.uniform(18, 35),
-                'uv_index': random.uniform(1, 11),
-                'air_quality_index': random.randint(1, 5),
-                'wind_gust': random.uniform(10, 30) if random.random() < 0.5 else None
-            }
+        # Latest sensor data for analysis
+        sensors_data = _collect_sensor_snapshot()
+        
+        # Latest (or mock) weather, as the irrigation predictor expects it
+        weather_data = _weather_snapshot()
+        weather_data['rainfall_forecast'] = weather_data.pop('rainfall')
+        del weather_data['weather_condition'], weather_data['cloud_coverage']
         
         # Get plant data
-        plants = Plant.objects.all()
+        plant_summary = _plant_summary()
         plant_data = {
-            'total_plants': plants.count(),
-            'average_health': plants.filter(health_status__in=['excellent', 'good']).count() / max(1, plants.count()) * 100
+            'total_plants': plant_summary['total'],
+            'average_health': plant_summary['healthy'] / max(1, plant_summary['total']) * 100
         }
         
         # Run AI prediction
@@ -73,7 +131,7 @@ def analyze_irrigation_need(request):
         
         # Save prediction to database
         if not prediction_result.get('error'):
-            ai_model, created = AIModel.objects.get_or_create(
+            ai_model, created = AIModel.objects.only('id').get_or_create(
                 model_type='irrigation_predictor',
                 defaults={'name': 'Irrigation Predictor', 'accuracy': 94.2}
             )
@@ -108,26 +166,24 @@ def analyze_plant_health(request):
     """Analyze plant health using AI"""
     try:
         plant_id = request.data.get('plant_id')
+        # Only the columns the analysis reads; days_since_planted derives from planted_date
+        plants = Plant.objects.only(
+            'id', 'name', 'planted_date', 'height', 'growth_stage', 'health_status', 'leaf_count'
+        )
         
         if plant_id:
             try:
-                plant = Plant.objects.get(id=plant_id)
+                plant = plants.get(id=plant_id)
             except Plant.DoesNotExist:
                 return Response({'error': 'Plant not found'}, status=status.HTTP_404_NOT_FOUND)
         else:
-            plant = Plant.objects.first()  # Analyze first plant if none specified
+            plant = plants.first()  # Analyze first plant if none specified
         
         if not plant:
             return Response({'error': 'No plants found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Generate FRESH sensor data for plant health analysis
-        sensors_data = {}
-        sensors = Sensor.objects.filter(status='active')
-        for sensor in sensors:
-            # Generate new random reading for fresh AI analysis
-            fresh_reading = SensorReading.generate_random_reading(sensor)
-            sensor_key = sensor.sensor_type.name.lower().replace(' ', '_')
-            sensors_data[sensor_key] = fresh_reading.value
+        # Latest sensor data for plant health analysis
+        sensors_data = _collect_sensor_snapshot()
         
         # Get plant data
         plant_data = {
@@ -148,7 +204,7 @@ def analyze_plant_health(request):
         
         # Save analysis results
         if not health_result.get('error'):
-            ai_model, created = AIModel.objects.get_or_create(
+            ai_model, created = AIModel.objects.only('id').get_or_create(
                 model_type='plant_health',
                 defaults={'name': 'Plant Health Analyzer', 'accuracy': 89.5}
             )
@@ -191,55 +247,18 @@ def comprehensive_analysis(request):
             critical_alerts=[]
         )
         
-        # Collect all data with FRESH sensor readings
-        sensors_data = {}
-        sensors = Sensor.objects.filter(status='active')
-        for sensor in sensors:
-            # Generate new random reading for comprehensive AI analysis
-            fresh_reading = SensorReading.generate_random_reading(sensor)
-            sensor_key = sensor.sensor_type.name.lower().replace(' ', '_')
-            sensors_data[sensor_key] = fresh_reading.value
-        
-        # Get or generate fresh weather data for comprehensive analysis
-        latest_weather = WeatherData.objects.first()
-        weather_data = {}
-        if latest_weather:
-            weather_data = {
-                'temperature': latest_weather.temperature,
-                'humidity': latest_weather.humidity,
-                'rainfall': latest_weather.rainfall,
-                'wind_speed': latest_weather.wind_speed,
-                'weather_condition': latest_weather.weather_condition,
-                'feels_like_temperature': latest_weather.feels_like_temperature,
-                'uv_index': latest_weather.uv_index,
-                'air_quality_index': latest_weather.air_quality_index,
-                'pressure': latest_weather.pressure,
-                'wind_gust': latest_weather.wind_gust,
-                'cloud_coverage': latest_weather.cloud_coverage
-            }
-        else:
-            # Generate fresh mock weather data
-            import random
-            weather_data = {
-                'temperature': random.uniform(20, 32),
-                'humidity': random.uniform(40, 75),
-                'rainfall': random.uniform(0, 10) if random.random() < 0.3 else 0,
-                'wind_speed': random.uniform(5, 20),
-                'weather_condition': random.choice(['Clear', 'Partly Cloudy', 'Cloudy', 'Rain']),
-                'feels_like_temperature': random.uniform(18, 35),
-                'uv_index': random.uniform(1, 11),
-                'air_quality_index': random.randint(1, 5),
-                'pressure': random.uniform(1010, 1025),
-                'wind_gust': random.uniform(10, 30) if random.random() < 0.5 else None,
-                'cloud_coverage': random.randint(0, 100)
-            }
+        # Collect all data with the latest sensor readings
+        sensors_data = _collect_sensor_snapshot()
+        
+        # Latest (or mock) weather for comprehensive analysis
+        weather_data = _weather_snapshot()
         
         # Plant data
-        plants = Plant.objects.all()
+        plant_summary = _plant_summary()
         plant_data = {
-            'total_plants': plants.count(),
-            'healthy_plants': plants.filter(health_status__in=['excellent', 'good']).count(),
-            'plants_needing_attention': plants.filter(health_status__in=['fair', 'poor', 'critical']).count()
+            'total_plants': plant_summary['total'],
+            'healthy_plants': plant_summary['healthy'],
+            'plants_needing_attention': plant_summary['attention']
         }
         
         # Historical trends (mock)
@@ -275,17 +294,19 @@ def comprehensive_analysis(request):
         
         session.save()
         
-        # Create insights
+        # Create insights (one batched INSERT)
         insights = gemini_result.get('insights', [])
-        for insight_data in insights:
-            AIInsight.objects.create(
-                insight_type='pattern_discovery',
-                title=insight_data.get('title', 'AI Insight'),
-                description=insight_data.get('description', ''),
-                importance_level=insight_data.get('priority', 'medium'),
-                supporting_data={'session_id': session_id},
-                confidence_level=gemini_result.get('confidence_score', 85)
-            )
+        AIInsight.objects.ingest(
+            {
+                'insight_type': 'pattern_discovery',
+                'title': insight_data.get('title', 'AI Insight'),
+                'description': insight_data.get('description', ''),
+                'importance_level': insight_data.get('priority', 'medium'),
+                'supporting_data': {'session_id': session_id},
+                'confidence_level': gemini_result.get('confidence_score', 85)
+            }
+            for insight_data in insights
+        )
         
         return Response({
             'session_id': session_id,
@@ -312,21 +333,24 @@ def comprehensive_analysis(request):
 def get_ai_insights(request):
     """Get latest AI insights"""
     try:
-        # Get recent insights
-        insights = AIInsight.objects.all()[:10]
+        # Get recent insights (plain rows, no model instances)
+        insights = AIInsight.objects.values(
+            'id', 'insight_type', 'title', 'description', 'importance_level', 'confidence_level',
+            'created_at', 'recommended_actions', 'is_implemented'
+        )[:10]
         
         insights_data = []
         for insight in insights:
             insights_data.append({
-                'id': insight.id,
-                'type': insight.get_insight_type_display(),
-                'title': insight.title,
-                'description': insight.description,
-                'importance': insight.get_importance_level_display(),
-                'confidence': insight.confidence_level,
-                'created_at': insight.created_at,
-                'recommended_actions': insight.recommended_actions,
-                'is_implemented': insight.is_implemented
+                'id': insight['id'],
+                'type': INSIGHT_TYPE_LABELS.get(insight['insight_type'], insight['insight_type']),
+                'title': insight['title'],
+                'description': insight['description'],
+                'importance': IMPORTANCE_LEVEL_LABELS.get(insight['importance_level'], insight['importance_level']),
+                'confidence': insight['confidence_level'],
+                'created_at': insight['created_at'],
+                'recommended_actions': insight['recommended_actions'],
+                'is_implemented': insight['is_implemented']
             })
         
         return Response(insights_data, status=status.HTTP_200_OK)
@@ -341,23 +365,24 @@ def get_ai_insights(request):
 def get_ai_model_status(request):
     """Get AI model status and performance"""
     try:
-        models = AIModel.objects.filter(is_active=True)
+        models = list(AIModel.objects.filter(is_active=True).values(
+            'id', 'name', 'model_type', 'version', 'accuracy', 'last_trained'
+        ))
+        recent_stats = AIPrediction.objects.recent_stats_by_model([model['id'] for model in models])
         
         models_data = []
         for model in models:
-            recent_predictions = AIPrediction.objects.filter(model=model)[:100]
+            recent_count, average_confidence = recent_stats.get(model['id'], (0, 0))
             
             models_data.append({
-                'id': model.id,
-                'name': model.name,
-                'type': model.get_model_type_display(),
-                'version': model.version,
-                'accuracy': model.accuracy,
-                'last_trained': model.last_trained,
-                'recent_predictions': recent_predictions.count(),
-                'average_confidence': round(
-                    sum([p.confidence_score for p in recent_predictions[:10]]) / max(1, len(recent_predictions[:10])), 1
-                )
+                'id': model['id'],
+                'name': model['name'],
+                'type': MODEL_TYPE_LABELS.get(model['model_type'], model['model_type']),
+                'version': model['version'],
+                'accuracy': model['accuracy'],
+                'last_trained': model['last_trained'],
+                'recent_predictions': recent_count,
+                'average_confidence': round(average_confidence, 1)
             })
         
         return Response(models_data, status=status.HTTP_200_OK)
@@ -372,20 +397,27 @@ def get_ai_model_status(request):
 def get_analysis_history(request):
     """Get AI analysis session history"""
     try:
-        sessions = AIAnalysisSession.objects.all()[:20]
+        # Plain rows; the JSON arrays are only counted, in SQL
+        sessions = AIAnalysisSession.annotate_duration().annotate(
+            critical_alerts_count=JSONArrayLength('critical_alerts'),
+            recommendations_count=JSONArrayLength('recommendations')
+        ).values(
+            'session_id', 'session_type', 'status', 'started_at', 'completed_at', 'duration',
+            'predictions_generated', 'critical_alerts_count', 'recommendations_count'
+        )[:20]
         
         sessions_data = []
         for session in sessions:
             sessions_data.append({
-                'session_id': session.session_id,
-                'type': session.get_session_type_display(),
-                'status': session.get_status_display(),
-                'started_at': session.started_at,
-                'completed_at': session.completed_at,
-                'duration_minutes': round(session.duration_minutes, 1),
-                'predictions_generated': session.predictions_generated,
-                'critical_alerts_count': len(session.critical_alerts),
-                'recommendations_count': len(session.recommendations)
+                'session_id': session['session_id'],
+                'type': SESSION_TYPE_LABELS.get(session['session_type'], session['session_type']),
+                'status': SESSION_STATUS_LABELS.get(session['status'], session['status']),
+                'started_at': session['started_at'],
+                'completed_at': session['completed_at'],
+                'duration_minutes': round(session['duration'].total_seconds() / 60, 1),
+                'predictions_generated': session['predictions_generated'],
+                'critical_alerts_count': session['critical_alerts_count'],
+                'recommendations_count': session['recommendations_count']
             })
         
         return Response(sessions_data, status=status.HTTP_200_OK)
@@ -409,10 +441,9 @@ def train_model(request):
         )
         
         # Mock training improvement
-        import random
-        improvement = random.uniform(0.5, 2.0)
+        improvement = float(_mock_rng.uniform(0.5, 2.0))
         ai_model.accuracy = min(99.9, ai_model.accuracy + improvement)
-        ai_model.training_data_count += random.randint(100, 500)
+        ai_model.training_data_count += int(_mock_rng.integers(100, 501))
         ai_model.last_trained = timezone.now()
         ai_model.save()
         
@@ -0,0 +1,45 @@
+import functools
+
+from django.core.cache import cache
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+
+# Seconds a response is replayed for a repeated Idempotency-Key
+IDEMPOTENCY_KEY_TTL = 60
+
+
+def _client_ident(request) -> str:
+    """Authenticated user, or the client address (proxy-aware, as in DRF throttling)"""
+    if request.user and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'addr:{BaseThrottle().get_ident(request)}'
+
+
+def idempotent_command(view):
+    """
+    Replay the response of a repeated control command carrying the same Idempotency-Key header
+
+    Apply below @api_view. Successful responses are kept for IDEMPOTENCY_KEY_TTL
+    seconds per client, path and key, so a client re-sending a command
+    (retries, double clicks, a looping dashboard) gets the original result
+    instead of running it again.
+    """
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(request, *args, **kwargs)
+
+        cache_key = f'idempotency:{_client_ident(request)}:{request.path}:{key}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            data, status_code = cached
+            return Response(data, status=status_code)
+
+        response = view(request, *args, **kwargs)
+        if 200 <= response.status_code < 300:
+            cache.set(cache_key, (response.data, response.status_code), IDEMPOTENCY_KEY_TTL)
+        return response
+
+    return wrapper
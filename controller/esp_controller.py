@@ -3,13 +3,42 @@ ESP32 Controller Module
 This module handles communication with ESP32 devices for irrigation control.
 """
 
+import asyncio
+import functools
 import requests
 import logging
-from typing import Dict, List, Optional
+import random
+import time
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
 from django.conf import settings
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+ESP32_MAX_CONCURRENCY = 16  # Device requests in flight per process
+PUMPS_PER_CONTROLLER = 4
+
+# Seconds a command may spend retrying, counted from its first attempt; callers
+# are mostly request handlers, so an unreachable device must fail fast
+ESP32_RETRY_BUDGET = 3.0
+
+# Seconds a successful device read is reused, per read-only endpoint (short / normal / long)
+ESP32_READ_TTLS = {
+    'pump/status': 2,
+    'sensors/read': 3,
+    'system/info': 30,
+}
+
+# Endpoints every controller uses; their URLs are built once per controller
+ESP32_ENDPOINTS = (
+    'pump/control', 'pump/status', 'sensors/read', 'sensors/calibrate', 'system/info', 'system/reset'
+)
+
+# Shared pool for fanning blocking device requests out across controllers
+_device_executor = ThreadPoolExecutor(max_workers=ESP32_MAX_CONCURRENCY, thread_name_prefix='esp32')
+
 
 class ESP32Controller:
     """Controller class for ESP32 communication"""
@@ -18,28 +47,78 @@ class ESP32Controller:
         self.esp32_ip = esp32_ip
         self.port = port
         self.base_url = f"http://{esp32_ip}:{port}"
+        self._urls: Dict[str, str] = {endpoint: f"{self.base_url}/{endpoint}" for endpoint in ESP32_ENDPOINTS}
+        # endpoint -> (monotonic expiry, last successful response)
+        self._read_cache: Dict[str, tuple] = {}
+        # Time of the last successful response from the device
+        self.last_seen = None
+        
+        # Keep-alive connections reused by every command to this device, one
+        # per pump so a concurrent stop of all pumps needs no new handshakes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=PUMPS_PER_CONTROLLER)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def close(self):
+        """Close the pooled connections to the device"""
+        self.session.close()
         
-    def send_command(self, endpoint: str, data: Optional[Dict] = None, timeout: int = 10) -> Dict:
+    def send_command(self, endpoint: str, data: Optional[Dict] = None, timeout: int = 10,
+                     idempotent: Optional[bool] = None, max_retries: int = 3,
+                     base_delay: float = 0.2, max_delay: float = 2.0,
+                     retry_budget: float = ESP32_RETRY_BUDGET) -> Dict:
         """
         Send command to ESP32 device
         
+        Connection errors and timeouts of idempotent commands are retried with
+        exponential backoff plus jitter while retry_budget lasts; HTTP error
+        responses are not retried.
+        
         Args:
             endpoint (str): API endpoint on ESP32
             data (dict, optional): Data to send
             timeout (int): Request timeout in seconds
+            idempotent (bool, optional): Whether the command is safe to repeat
+                (default: True for reads, False for commands with data)
+            max_retries (int): Retries after the first attempt
+            base_delay (float): Backoff before the first retry, in seconds
+            max_delay (float): Upper bound of the backoff, in seconds
+            retry_budget (float): Seconds after the first attempt started within
+                which retries (backoff and request) must finish
             
         Returns:
             dict: Response from ESP32
         """
+        if idempotent is None:
+            idempotent = not data
+        attempts = max_retries + 1 if idempotent else 1
+        
         try:
-            url = f"{self.base_url}/{endpoint}"
+            url = self._urls.get(endpoint)
+            if url is None:
+                url = self._urls[endpoint] = f"{self.base_url}/{endpoint}"
             
-            if data:
-                response = requests.post(url, json=data, timeout=timeout)
-            else:
-                response = requests.get(url, timeout=timeout)
+            deadline = time.monotonic() + retry_budget
+            request_timeout = timeout
+            for attempt in range(attempts):
+                try:
+                    if data:
+                        response = self.session.post(url, json=data, timeout=request_timeout)
+                    else:
+                        response = self.session.get(url, timeout=request_timeout)
+                    break
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    delay = min(max_delay, base_delay * 2 ** attempt) + random.uniform(0, 0.1)
+                    remaining = deadline - time.monotonic() - delay
+                    if attempt + 1 == attempts or remaining <= 0:
+                        raise
+                    request_timeout = min(timeout, remaining)
+                    logger.warning("ESP32 %s unreachable (%s), retrying in %.2fs", url, e, delay)
+                    time.sleep(delay)
             
             response.raise_for_status()
+            self.last_seen = timezone.now()
             return {
                 'success': True,
                 'data': response.json() if response.content else {},
@@ -54,6 +133,37 @@ class ESP32Controller:
                 'status_code': None
             }
     
+    async def send_command_async(self, endpoint: str, data: Optional[Dict] = None, **options) -> Dict:
+        """
+        Awaitable send_command for async views and tasks
+        
+        The blocking request (with its retries) runs in the shared device pool,
+        so the event loop keeps serving while the device answers.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _device_executor, functools.partial(self.send_command, endpoint, data, **options)
+        )
+    
+    def _cached_read(self, endpoint: str) -> Dict:
+        """
+        Read a read-only endpoint, reusing the last success within its TTL
+        
+        If the device fails, the last successful response is returned
+        (marked 'stale') when there is one.
+        """
+        now = time.monotonic()
+        cached = self._read_cache.get(endpoint)
+        if cached and now < cached[0]:
+            return cached[1]
+        
+        result = self.send_command(endpoint)
+        if result['success']:
+            self._read_cache[endpoint] = (now + ESP32_READ_TTLS[endpoint], result)
+        elif cached:
+            return {**cached[1], 'stale': True}
+        return result
+    
     def start_pump(self, pump_id: int, duration_minutes: int) -> Dict:
         """
         Start water pump
@@ -70,6 +180,7 @@ class ESP32Controller:
             'duration': duration_minutes,
             'action': 'start'
         }
+        self._read_cache.pop('pump/status', None)
         return self.send_command('pump/control', data)
     
     def stop_pump(self, pump_id: int) -> Dict:
@@ -86,7 +197,22 @@ class ESP32Controller:
             'pump_id': pump_id,
             'action': 'stop'
         }
-        return self.send_command('pump/control', data)
+        self._read_cache.pop('pump/status', None)
+        return self.send_command('pump/control', data, idempotent=True)
+    
+    def stop_all_pumps(self) -> Dict:
+        """
+        Stop every pump of this device with one command
+        
+        Returns:
+            dict: Operation result
+        """
+        data = {
+            'pump_ids': list(range(1, PUMPS_PER_CONTROLLER + 1)),
+            'action': 'stop'
+        }
+        self._read_cache.pop('pump/status', None)
+        return self.send_command('pump/control', data, idempotent=True)
     
     def get_pump_status(self) -> Dict:
         """
@@ -95,7 +221,7 @@ class ESP32Controller:
         Returns:
             dict: Pump status information
         """
-        return self.send_command('pump/status')
+        return self._cached_read('pump/status')
     
     def get_sensor_readings(self) -> Dict:
         """
@@ -104,7 +230,7 @@ class ESP32Controller:
         Returns:
             dict: Sensor data
         """
-        return self.send_command('sensors/read')
+        return self._cached_read('sensors/read')
     
     def calibrate_sensor(self, sensor_id: str) -> Dict:
         """
@@ -117,6 +243,7 @@ class ESP32Controller:
             dict: Calibration result
         """
         data = {'sensor_id': sensor_id}
+        self._read_cache.pop('sensors/read', None)
         return self.send_command('sensors/calibrate', data)
     
     def get_system_info(self) -> Dict:
@@ -126,7 +253,7 @@ class ESP32Controller:
         Returns:
             dict: System information
         """
-        return self.send_command('system/info')
+        return self._cached_read('system/info')
     
     def reset_system(self) -> Dict:
         """
@@ -135,17 +262,25 @@ class ESP32Controller:
         Returns:
             dict: Reset result
         """
+        self._read_cache.clear()
         return self.send_command('system/reset', {'action': 'reset'})
 
 
 class ESP32Manager:
     """Manager class for multiple ESP32 devices"""
     
-    def __init__(self):
-        self.controllers: Dict[str, ESP32Controller] = {}
-        self._load_esp32_devices()
+    @functools.cached_property
+    def controllers(self) -> Dict[str, ESP32Controller]:
+        """Controllers by name, loaded on first use rather than at import time"""
+        return self._load_esp32_devices()
     
-    def _load_esp32_devices(self):
+    def reload_devices(self):
+        """Drop the loaded controllers (closing their connections); the next use reloads them"""
+        controllers = self.__dict__.pop('controllers', {})
+        for controller in controllers.values():
+            controller.close()
+    
+    def _load_esp32_devices(self) -> Dict[str, ESP32Controller]:
         """Load ESP32 device configurations from settings"""
         # In a real implementation, this would load from database or settings
         esp32_devices = [
@@ -154,13 +289,17 @@ class ESP32Manager:
             {'name': 'zone_b_controller', 'ip': '192.168.1.102'},
         ]
         
-        for device in esp32_devices:
-            self.controllers[device['name']] = ESP32Controller(device['ip'])
+        return {device['name']: ESP32Controller(device['ip']) for device in esp32_devices}
     
     def get_controller(self, name: str) -> Optional[ESP32Controller]:
         """Get ESP32 controller by name"""
         return self.controllers.get(name)
     
+    def _run_concurrently(self, calls: Dict[str, Callable[[], Dict]]) -> Dict[str, Dict]:
+        """Run device calls in parallel on the shared pool; results keep the order of calls"""
+        futures = {key: _device_executor.submit(call) for key, call in calls.items()}
+        return {key: future.result() for key, future in futures.items()}
+    
     def broadcast_command(self, endpoint: str, data: Optional[Dict] = None) -> Dict[str, Dict]:
         """
         Send command to all ESP32 devices
@@ -172,10 +311,26 @@ class ESP32Manager:
         Returns:
             dict: Results from all devices
         """
-        results = {}
-        for name, controller in self.controllers.items():
-            results[name] = controller.send_command(endpoint, data)
-        return results
+        return self._run_concurrently({
+            name: functools.partial(controller.send_command, endpoint, data)
+            for name, controller in self.controllers.items()
+        })
+    
+    async def broadcast_command_async(self, endpoint: str, data: Optional[Dict] = None) -> Dict[str, Dict]:
+        """
+        Awaitable broadcast_command: all devices are contacted concurrently
+        
+        Args:
+            endpoint (str): API endpoint
+            data (dict, optional): Data to send
+            
+        Returns:
+            dict: Results from all devices
+        """
+        results = await asyncio.gather(
+            *(controller.send_command_async(endpoint, data) for controller in self.controllers.values())
+        )
+        return dict(zip(self.controllers, results))
     
     def start_irrigation_zone(self, zone_name: str, pump_id: int, duration_minutes: int) -> Dict:
         """
@@ -202,12 +357,10 @@ class ESP32Manager:
         Returns:
             dict: Results from all controllers
         """
-        results = {}
-        for name, controller in self.controllers.items():
-            # Stop all pumps (assuming 4 pumps per controller)
-            for pump_id in range(1, 5):
-                results[f'{name}_pump_{pump_id}'] = controller.stop_pump(pump_id)
-        return results
+        # One stop-all command per controller, all controllers at once
+        return self._run_concurrently({
+            name: controller.stop_all_pumps for name, controller in self.controllers.items()
+        })
     
     def get_all_sensor_readings(self) -> Dict[str, Dict]:
         """
@@ -216,10 +369,9 @@ class ESP32Manager:
         Returns:
             dict: Sensor data from all devices
         """
-        results = {}
-        for name, controller in self.controllers.items():
-            results[name] = controller.get_sensor_readings()
-        return results
+        return self._run_concurrently({
+            name: controller.get_sensor_readings for name, controller in self.controllers.items()
+        })
     
     def get_system_health(self) -> Dict[str, Dict]:
         """
@@ -228,23 +380,48 @@ class ESP32Manager:
         Returns:
             dict: Health status of all devices
         """
-        results = {}
-        for name, controller in self.controllers.items():
-            try:
-                info = controller.get_system_info()
-                results[name] = {
-                    'online': info['success'],
-                    'info': info.get('data', {}),
-                    'last_check': None  # Would be timestamp in real implementation
-                }
-            except Exception as e:
-                results[name] = {
-                    'online': False,
-                    'error': str(e),
-                    'last_check': None
-                }
-        return results
+        # get_system_info reports failures in its result and is cached for
+        # ESP32_READ_TTLS['system/info'], so repeat polls stay off the network
+        infos = self._run_concurrently({
+            name: controller.get_system_info for name, controller in self.controllers.items()
+        })
+        return {
+            name: self._health_entry(self.controllers[name], info) for name, info in infos.items()
+        }
+    
+    async def get_system_health_async(self) -> Dict[str, Dict]:
+        """
+        Awaitable get_system_health: all devices are checked concurrently
+        
+        Returns:
+            dict: Health status of all devices
+        """
+        loop = asyncio.get_running_loop()
+        infos = await asyncio.gather(
+            *(loop.run_in_executor(_device_executor, controller.get_system_info)
+              for controller in self.controllers.values()),
+            return_exceptions=True
+        )
+        return {
+            name: self._health_entry(controller, info)
+            for (name, controller), info in zip(self.controllers.items(), infos)
+        }
+    
+    @staticmethod
+    def _health_entry(controller: ESP32Controller, info) -> Dict:
+        """Health record from a system-info result, or from the exception raised fetching it"""
+        if isinstance(info, Exception):
+            return {
+                'online': False,
+                'error': str(info),
+                'last_check': controller.last_seen
+            }
+        return {
+            'online': info['success'] and not info.get('stale', False),
+            'info': info.get('data', {}),
+            'last_check': controller.last_seen
+        }
 
 
-# Global ESP32 manager instance
+# Global ESP32 manager instance (devices are loaded on first use)
 esp32_manager = ESP32Manager()
\ No newline at end of file
@@ -0,0 +1,357 @@
+from datetime import date, timedelta
+from unittest import mock
+
+import requests
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from plant.models import IrrigationEvent, IrrigationZone, Plant, PlantType
+from sensor.models import SystemStatus
+from .esp_controller import ESP32_READ_TTLS, ESP32_RETRY_BUDGET, ESP32Controller, ESP32Manager
+from .throttling import ControlRateThrottle
+from .views import STATUS_CACHE_KEYS
+
+
+def _device_response(payload=None):
+    """Successful HTTP response from an ESP32 device"""
+    response = mock.Mock(status_code=200, content=b'{}')
+    response.json.return_value = payload or {}
+    return response
+
+
+class DeviceTestCase(SimpleTestCase):
+    """ESP32 controller with a mocked HTTP session, a controllable clock and no backoff sleeps"""
+
+    def setUp(self):
+        self.controller = ESP32Controller('192.168.1.50')
+        self.controller.session.close()
+        self.controller.session = mock.Mock()
+        self.clock = mock.patch('controller.esp_controller.time.monotonic', return_value=1000.0).start()
+        self.sleep = mock.patch('controller.esp_controller.time.sleep').start()
+        self.addCleanup(mock.patch.stopall)
+
+
+class CachedReadTests(DeviceTestCase):
+
+    def test_read_within_ttl_makes_no_request(self):
+        self.controller.session.get.return_value = _device_response({'pumps': []})
+
+        first = self.controller.get_pump_status()
+        self.clock.return_value += ESP32_READ_TTLS['pump/status'] - 0.5
+        second = self.controller.get_pump_status()
+
+        self.assertEqual(self.controller.session.get.call_count, 1)
+        self.assertEqual(second, first)
+
+    def test_failure_after_ttl_returns_stale_copy(self):
+        self.controller.session.get.return_value = _device_response({'version': '1.0'})
+        manager = ESP32Manager()
+        manager.__dict__['controllers'] = {'main_controller': self.controller}
+        self.assertTrue(manager.get_system_health()['main_controller']['online'])
+
+        self.clock.return_value += ESP32_READ_TTLS['system/info'] + 1
+        self.controller.session.get.side_effect = requests.exceptions.ConnectionError('offline')
+
+        self.assertEqual(
+            self.controller.get_system_info(),
+            {'success': True, 'data': {'version': '1.0'}, 'status_code': 200, 'stale': True}
+        )
+        health = manager.get_system_health()['main_controller']
+        self.assertFalse(health['online'])
+        self.assertEqual(health['info'], {'version': '1.0'})
+
+    def test_control_commands_drop_cached_reads(self):
+        self.controller.session.get.return_value = _device_response()
+        self.controller.session.post.return_value = _device_response()
+        commands = (
+            ('pump/status', self.controller.get_pump_status, lambda: self.controller.start_pump(1, 5)),
+            ('pump/status', self.controller.get_pump_status, lambda: self.controller.stop_pump(1)),
+            ('pump/status', self.controller.get_pump_status, self.controller.stop_all_pumps),
+            ('sensors/read', self.controller.get_sensor_readings, lambda: self.controller.calibrate_sensor('s1')),
+            ('system/info', self.controller.get_system_info, self.controller.reset_system),
+        )
+        for endpoint, read, command in commands:
+            with self.subTest(endpoint=endpoint, command=command):
+                read()
+                self.assertIn(endpoint, self.controller._read_cache)
+                command()
+                self.assertNotIn(endpoint, self.controller._read_cache)
+
+
+class SendCommandRetryTests(DeviceTestCase):
+
+    def test_read_is_retried_after_connection_error(self):
+        self.controller.session.get.side_effect = [
+            requests.exceptions.ConnectionError('refused'), _device_response({'version': '1.0'})
+        ]
+
+        result = self.controller.send_command('system/info')
+
+        self.assertTrue(result['success'])
+        self.assertEqual(self.controller.session.get.call_count, 2)
+        self.sleep.assert_called_once()
+
+    def test_start_pump_and_reset_are_sent_once(self):
+        self.controller.session.post.side_effect = requests.exceptions.Timeout('timed out')
+        for command in (lambda: self.controller.start_pump(1, 5), self.controller.reset_system):
+            with self.subTest(command=command):
+                self.controller.session.post.reset_mock()
+
+                self.assertFalse(command()['success'])
+                self.assertEqual(self.controller.session.post.call_count, 1)
+        self.sleep.assert_not_called()
+
+    def test_stop_commands_are_retried(self):
+        for command in (lambda: self.controller.stop_pump(1), self.controller.stop_all_pumps):
+            with self.subTest(command=command):
+                self.controller.session.post.reset_mock()
+                self.controller.session.post.side_effect = [
+                    requests.exceptions.ConnectionError('refused'), _device_response()
+                ]
+
+                self.assertTrue(command()['success'])
+                self.assertEqual(self.controller.session.post.call_count, 2)
+
+    def test_retry_timeout_is_cut_to_the_remaining_budget(self):
+        self.controller.session.get.side_effect = [requests.exceptions.Timeout('timed out'), _device_response()]
+
+        self.controller.send_command('system/info', timeout=10)
+
+        first_call, retry = self.controller.session.get.call_args_list
+        self.assertEqual(first_call.kwargs['timeout'], 10)
+        self.assertLess(retry.kwargs['timeout'], ESP32_RETRY_BUDGET)
+
+    def test_no_retry_when_backoff_exceeds_budget(self):
+        self.controller.session.get.side_effect = requests.exceptions.ConnectionError('refused')
+
+        result = self.controller.send_command(
+            'system/info', base_delay=ESP32_RETRY_BUDGET + 1, max_delay=ESP32_RETRY_BUDGET + 1
+        )
+
+        self.assertFalse(result['success'])
+        self.assertEqual(self.controller.session.get.call_count, 1)
+        self.sleep.assert_not_called()
+
+    def test_no_retry_when_first_attempt_used_the_budget(self):
+        def time_out(url, timeout):
+            self.clock.return_value += timeout
+            raise requests.exceptions.Timeout('timed out')
+        self.controller.session.get.side_effect = time_out
+
+        self.controller.send_command('system/info', timeout=10)
+
+        self.assertEqual(self.controller.session.get.call_count, 1)
+
+
+class StopAllIrrigationTests(SimpleTestCase):
+
+    def test_one_stop_all_command_per_controller(self):
+        manager = ESP32Manager()
+        self.addCleanup(manager.reload_devices)
+        for controller in manager.controllers.values():
+            controller.session.close()
+            controller.session = mock.Mock()
+            controller.session.post.return_value = _device_response()
+
+        results = manager.stop_all_irrigation()
+
+        self.assertEqual(list(results), ['main_controller', 'zone_a_controller', 'zone_b_controller'])
+        for name, controller in manager.controllers.items():
+            with self.subTest(controller=name):
+                self.assertTrue(results[name]['success'])
+                controller.session.post.assert_called_once_with(
+                    f'{controller.base_url}/pump/control',
+                    json={'pump_ids': [1, 2, 3, 4], 'action': 'stop'},
+                    timeout=10
+                )
+
+
+class ControllerTestCase(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        plant_type = PlantType.objects.create(name='Pomidor')
+        cls.zone = IrrigationZone.objects.create(zone_id='Z1', name='Issiqxona', area_sqm=50, flow_rate_lpm=10)
+        IrrigationZone.objects.create(zone_id='Z2', name='Bog', area_sqm=80, status='inactive')
+        cls.plants = [
+            Plant.objects.create(
+                plant_id=f'P{index}', name=f'Pomidor {index}', plant_type=plant_type,
+                location='Issiqxona, qator 1', planted_date=date(2024, 4, 1)
+            )
+            for index in range(3)
+        ]
+        cls.outside_plant = Plant.objects.create(
+            plant_id='P9', name='Olma', plant_type=plant_type, location='Bog', planted_date=date(2024, 4, 1)
+        )
+        SystemStatus.objects.create(status='active')
+
+    def setUp(self):
+        # Throttle history, status payloads and idempotent replays all live in the cache
+        cache.clear()
+
+    def start_event(self, plant, status='in_progress', started_minutes_ago=10):
+        start_time = timezone.now() - timedelta(minutes=started_minutes_ago)
+        return IrrigationEvent.objects.create(
+            plant=plant, event_type='manual', status=status, scheduled_time=start_time,
+            start_time=start_time if status == 'in_progress' else None,
+            duration_minutes=20, water_amount_ml=2000, trigger_reason='test'
+        )
+
+
+class StartIrrigationTests(ControllerTestCase):
+
+    def test_skips_plants_with_active_events(self):
+        self.start_event(self.plants[0])
+        self.start_event(self.plants[1], status='scheduled')
+
+        response = self.client.post(reverse('start-irrigation'), format='json')
+
+        self.assertEqual(response.data['events_started'], 1)
+        self.assertEqual(IrrigationEvent.objects.filter(plant=self.plants[2]).count(), 1)
+
+    def test_unknown_or_inactive_zone_is_404(self):
+        for zone_id in ('Z404', 'Z2'):
+            response = self.client.post(reverse('start-irrigation'), {'zone_id': zone_id}, format='json')
+
+            self.assertEqual(response.status_code, 404)
+        self.assertFalse(IrrigationEvent.objects.exists())
+
+
+class ZonePlantMatchingTests(ControllerTestCase):
+
+    def test_starts_plants_of_active_zones_with_zone_water(self):
+        response = self.client.post(reverse('start-irrigation'), {'duration_minutes': 15}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['events_started'], 3)
+        events = IrrigationEvent.objects.filter(status='in_progress')
+        self.assertCountEqual([event.plant_id for event in events], [plant.id for plant in self.plants])
+        self.assertEqual({event.water_amount_ml for event in events}, {int(15 * 10 * 16.67)})
+        self.zone.refresh_from_db()
+        self.assertIsNotNone(self.zone.last_irrigated)
+
+
+class StopIrrigationTests(ControllerTestCase):
+
+    def test_completes_running_events(self):
+        running = self.start_event(self.plants[0], started_minutes_ago=10)
+        scheduled = self.start_event(self.plants[1], status='scheduled')
+
+        response = self.client.post(reverse('stop-irrigation'))
+
+        self.assertEqual(response.data['events_stopped'], 1)
+        running.refresh_from_db()
+        self.assertEqual(running.status, 'completed')
+        self.assertIsNotNone(running.end_time)
+        self.assertEqual(running.actual_duration_minutes, 10)
+        self.assertEqual(running.actual_water_amount_ml, 1000)
+        scheduled.refresh_from_db()
+        self.assertEqual(scheduled.status, 'scheduled')
+
+
+class EmergencyStopTests(ControllerTestCase):
+
+    def test_cancels_running_and_scheduled_events(self):
+        running = self.start_event(self.plants[0])
+        scheduled = self.start_event(self.plants[1], status='scheduled')
+
+        response = self.client.post(reverse('emergency-stop'))
+
+        self.assertEqual(response.data['events_stopped'], 2)
+        running.refresh_from_db()
+        scheduled.refresh_from_db()
+        self.assertEqual((running.status, scheduled.status), ('cancelled', 'cancelled'))
+        self.assertIsNotNone(running.end_time)
+        self.assertIsNone(scheduled.end_time)
+        self.assertEqual(SystemStatus.objects.get().status, 'error')
+
+
+class StatusCacheInvalidationTests(ControllerTestCase):
+
+    def test_control_commands_refresh_irrigation_status(self):
+        self.assertEqual(self.client.get(reverse('irrigation-status')).data['active_irrigations'], 0)
+
+        self.client.post(reverse('start-irrigation'), format='json')
+        self.assertEqual(self.client.get(reverse('irrigation-status')).data['active_irrigations'], 3)
+
+        self.client.post(reverse('emergency-stop'))
+        status_data = self.client.get(reverse('irrigation-status')).data
+        self.assertEqual(status_data['active_irrigations'], 0)
+        self.assertFalse(status_data['system_active'])
+
+    def test_status_is_served_from_cache_between_commands(self):
+        self.client.get(reverse('irrigation-status'))
+        self.start_event(self.plants[0])
+
+        self.assertEqual(self.client.get(reverse('irrigation-status')).data['active_irrigations'], 0)
+
+    def test_every_control_command_drops_status_entries(self):
+        commands = (
+            'start-irrigation', 'stop-irrigation', 'emergency-stop',
+            'system-restart', 'test-mode', 'calibrate-sensors',
+        )
+        for name in commands:
+            with self.subTest(command=name):
+                cache.set_many(dict.fromkeys(STATUS_CACHE_KEYS, 'stale'))
+
+                self.assertEqual(self.client.post(reverse(name), format='json').status_code, 200)
+                self.assertEqual(cache.get_many(STATUS_CACHE_KEYS), {})
+
+
+@mock.patch.object(ControlRateThrottle, 'timer', lambda throttle: 1000.0)
+class ControlThrottleTests(ControllerTestCase):
+
+    def test_limits_start_and_stop_per_client(self):
+        codes = [self.client.post(reverse('stop-irrigation')).status_code for _ in range(6)]
+
+        self.assertEqual(codes, [200] * 5 + [429])
+        self.assertEqual(self.client.post(reverse('start-irrigation'), format='json').status_code, 429)
+        self.assertEqual(self.client.post(reverse('stop-irrigation'), REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    def test_emergency_stop_is_never_throttled(self):
+        for _ in range(10):
+            self.assertEqual(self.client.post(reverse('emergency-stop')).status_code, 200)
+
+
+class IdempotencyKeyTests(ControllerTestCase):
+
+    def test_repeated_key_replays_response(self):
+        self.start_event(self.plants[0])
+        first = self.client.post(reverse('emergency-stop'), HTTP_IDEMPOTENCY_KEY='stop-1')
+        later_event = self.start_event(self.plants[1])
+        second = self.client.post(reverse('emergency-stop'), HTTP_IDEMPOTENCY_KEY='stop-1')
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        later_event.refresh_from_db()
+        self.assertEqual(later_event.status, 'in_progress')
+
+    def test_key_is_scoped_to_client_and_path(self):
+        self.start_event(self.plants[0])
+        self.client.post(reverse('emergency-stop'), HTTP_IDEMPOTENCY_KEY='k')
+        self.start_event(self.plants[1])
+
+        other_client = self.client.post(reverse('emergency-stop'), HTTP_IDEMPOTENCY_KEY='k', REMOTE_ADDR='10.0.0.2')
+        other_path = self.client.post(reverse('stop-irrigation'), HTTP_IDEMPOTENCY_KEY='k')
+
+        self.assertEqual(other_client.data['events_stopped'], 1)
+        self.assertEqual(other_path.data['status'], 'irrigation_stopped')
+
+    def test_errors_are_not_replayed(self):
+        missing = self.client.post(reverse('start-irrigation'), {'zone_id': 'Z404'}, format='json',
+                                   HTTP_IDEMPOTENCY_KEY='retry')
+        IrrigationZone.objects.create(zone_id='Z404', name='Yangi', area_sqm=10)
+        retried = self.client.post(reverse('start-irrigation'), {'zone_id': 'Z404'}, format='json',
+                                   HTTP_IDEMPOTENCY_KEY='retry')
+
+        self.assertEqual((missing.status_code, retried.status_code), (404, 200))
+
+    def test_requests_without_key_always_run(self):
+        self.start_event(self.plants[0])
+        self.client.post(reverse('emergency-stop'))
+        self.start_event(self.plants[1])
+
+        self.assertEqual(self.client.post(reverse('emergency-stop')).data['events_stopped'], 1)
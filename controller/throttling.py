@@ -0,0 +1,6 @@
+from rest_framework.throttling import UserRateThrottle
+
+
+class ControlRateThrottle(UserRateThrottle):
+    """Per-client limit for starting and stopping irrigation (rate: DEFAULT_THROTTLE_RATES['control'])"""
+    scope = 'control'
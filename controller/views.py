@@ -1,16 +1,42 @@
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, throttle_classes
 from rest_framework.response import Response
+from django.core.cache import cache
+from django.db.models import Case, Count, Q, Subquery, Value, When
 from django.utils import timezone
 from datetime import timedelta
+from functools import reduce
+import operator
 import random
-import time
 
-from plant.models import IrrigationEvent, IrrigationZone
+from plant.models import IrrigationEvent, IrrigationZone, Plant
 from sensor.models import SystemStatus
+from .decorators import idempotent_command
+from .throttling import ControlRateThrottle
+
+EVENT_UPDATE_BATCH_SIZE = 500
+
+# Dashboard polls these read endpoints; reuse their payloads for this many seconds.
+# Control endpoints drop both entries, so a command shows up on the next poll
+IRRIGATION_STATUS_CACHE_TIMEOUT = 3
+SYSTEM_DIAGNOSTICS_CACHE_TIMEOUT = 10
+STATUS_CACHE_KEYS = ('controller:irrigation_status', 'controller:system_diagnostics')
+
+
+def _update_system_status(**fields):
+    """Set fields on the latest SystemStatus row in a single UPDATE (no-op if there is none)"""
+    latest = SystemStatus.objects.values('pk')[:1]
+    return SystemStatus.objects.filter(pk=Subquery(latest)).update(**fields)
+
+
+def _system_status_value():
+    """Status of the latest SystemStatus row, or None (reads one column)"""
+    return SystemStatus.objects.values_list('status', flat=True).first()
 
 
 @api_view(['POST'])
+@throttle_classes([ControlRateThrottle])
+@idempotent_command
 def start_irrigation(request):
     """Start irrigation system"""
     try:
@@ -30,33 +56,48 @@ def start_irrigation(request):
                     'error': f'Zona {zone_id} topilmadi yoki faol emas'
                 }, status=status.HTTP_404_NOT_FOUND)
         
-        events_started = []
-        for zone in zones:
-            # Update zone status
-            zone.last_irrigated = timezone.now()
-            zone.save()
-            
-            # Create irrigation events for plants in this zone
-            plants_in_zone = zone.plants_in_zone
-            for plant in plants_in_zone:
-                # Check if there's already an active event
-                active_event = IrrigationEvent.objects.filter(
-                    plant=plant,
-                    status__in=['scheduled', 'in_progress']
-                ).first()
-                
-                if not active_event:
-                    event = IrrigationEvent.objects.create(
-                        plant=plant,
-                        event_type='manual',
-                        status='in_progress',
-                        scheduled_time=timezone.now(),
-                        start_time=timezone.now(),
-                        duration_minutes=duration_minutes,
-                        water_amount_ml=duration_minutes * zone.flow_rate_lpm * 16.67,  # Convert LPM to ml/min
-                        trigger_reason='Manual boshqaruv orqali boshlandi',
-                    )
-                    events_started.append(event)
+        zones = list(zones)
+        now = timezone.now()
+        
+        # Update zone status
+        IrrigationZone.objects.filter(id__in=[zone.id for zone in zones]).update(
+            last_irrigated=now, updated_at=now
+        )
+        
+        # Planned water per zone, computed once (LPM to ml/min)
+        zone_water_ml = [duration_minutes * zone.flow_rate_lpm * 16.67 for zone in zones]
+        
+        # Plants of all zones in one query (plants_in_zone matches on location, so it
+        # cannot be prefetched); a plant matching several zones gets the first one
+        plant_zones = {}
+        if zones:
+            zone_matches = [Q(location__icontains=zone.name) for zone in zones]
+            plant_zones = dict(Plant.objects.filter(reduce(operator.or_, zone_matches)).annotate(
+                zone_index=Case(*(When(match, then=Value(index)) for index, match in enumerate(zone_matches)))
+            ).values_list('id', 'zone_index'))
+        
+        # Skip plants that already have an active event (one lookup for all plants)
+        active_plant_ids = set(IrrigationEvent.objects.filter(
+            plant_id__in=plant_zones,
+            status__in=['scheduled', 'in_progress']
+        ).values_list('plant_id', flat=True))
+        
+        events_started = IrrigationEvent.objects.bulk_create([
+            IrrigationEvent(
+                plant_id=plant_id,
+                event_type='manual',
+                status='in_progress',
+                scheduled_time=now,
+                start_time=now,
+                duration_minutes=duration_minutes,
+                water_amount_ml=zone_water_ml[zone_index],
+                trigger_reason='Manual boshqaruv orqali boshlandi',
+            )
+            for plant_id, zone_index in plant_zones.items()
+            if plant_id not in active_plant_ids
+        ], batch_size=EVENT_UPDATE_BATCH_SIZE)
+        
+        cache.delete_many(STATUS_CACHE_KEYS)
         
         return Response({
             'message': message,
@@ -71,15 +112,17 @@ def start_irrigation(request):
 
 
 @api_view(['POST'])
+@throttle_classes([ControlRateThrottle])
+@idempotent_command
 def stop_irrigation(request):
     """Stop all active irrigation"""
     try:
-        active_events = IrrigationEvent.objects.filter(status='in_progress')
+        active_events = list(IrrigationEvent.objects.filter(status='in_progress'))
+        end_time = timezone.now()
         
-        events_stopped = 0
         for event in active_events:
             event.status = 'completed'
-            event.end_time = timezone.now()
+            event.end_time = end_time
             
             # Calculate actual duration and water amount
             if event.start_time:
@@ -88,9 +131,16 @@ def stop_irrigation(request):
                 event.actual_water_amount_ml = round(
                     actual_duration * event.water_amount_ml / event.duration_minutes
                 )
-            
-            event.save()
-            events_stopped += 1
+        
+        # One batched UPDATE instead of a save() per event
+        IrrigationEvent.objects.bulk_update(
+            active_events,
+            ['status', 'end_time', 'actual_duration_minutes', 'actual_water_amount_ml'],
+            batch_size=EVENT_UPDATE_BATCH_SIZE
+        )
+        events_stopped = len(active_events)
+        
+        cache.delete_many(STATUS_CACHE_KEYS)
         
         return Response({
             'message': f'Sug\'orish to\'xtatildi. {events_stopped} ta faol jarayon yakunlandi.',
@@ -104,39 +154,58 @@ def stop_irrigation(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _irrigation_status_data():
+    """Irrigation status payload (events, zones, system state)"""
+    # Event and zone counts, one conditional aggregate each
+    event_counts = IrrigationEvent.objects.aggregate(
+        active=Count('id', filter=Q(status='in_progress')),
+        scheduled=Count('id', filter=Q(status='scheduled'))
+    )
+    zone_counts = IrrigationZone.objects.aggregate(
+        active=Count('id', filter=Q(status='active')),
+        total=Count('id')
+    )
+    
+    # Get system status
+    system_status = _system_status_value()
+    
+    status_data = {
+        'system_active': system_status == 'active' if system_status else True,
+        'active_irrigations': event_counts['active'],
+        'scheduled_irrigations': event_counts['scheduled'],
+        'active_zones': zone_counts['active'],
+        'total_zones': zone_counts['total'],
+        'current_events': [],
+    }
+    
+    # Add details of current events (plant joined in the same query)
+    current_events = IrrigationEvent.objects.filter(status='in_progress').values(
+        'plant__name', 'plant__location', 'start_time', 'duration_minutes', 'water_amount_ml'
+    )[:5]  # Limit to 5 for performance
+    now = timezone.now()
+    for event in current_events:
+        status_data['current_events'].append({
+            'plant_name': event['plant__name'],
+            'zone': event['plant__location'],
+            'started_at': event['start_time'],
+            'duration_minutes': event['duration_minutes'],
+            'water_amount_ml': event['water_amount_ml'],
+            'progress_percent': min(100, (
+                (now - event['start_time']).total_seconds() / 60 
+                / event['duration_minutes'] * 100
+            )) if event['start_time'] else 0
+        })
+    
+    return status_data
+
+
 @api_view(['GET'])
 def get_irrigation_status(request):
     """Get current irrigation system status"""
     try:
-        # Get active irrigation events
-        active_events = IrrigationEvent.objects.filter(status='in_progress')
-        scheduled_events = IrrigationEvent.objects.filter(status='scheduled')
-        
-        # Get system status
-        system_status = SystemStatus.objects.first()
-        
-        status_data = {
-            'system_active': system_status.status == 'active' if system_status else True,
-            'active_irrigations': active_events.count(),
-            'scheduled_irrigations': scheduled_events.count(),
-            'active_zones': IrrigationZone.objects.filter(status='active').count(),
-            'total_zones': IrrigationZone.objects.count(),
-            'current_events': [],
-        }
-        
-        # Add details of current events
-        for event in active_events[:5]:  # Limit to 5 for performance
-            status_data['current_events'].append({
-                'plant_name': event.plant.name,
-                'zone': event.plant.location,
-                'started_at': event.start_time,
-                'duration_minutes': event.duration_minutes,
-                'water_amount_ml': event.water_amount_ml,
-                'progress_percent': min(100, (
-                    (timezone.now() - event.start_time).total_seconds() / 60 
-                    / event.duration_minutes * 100
-                )) if event.start_time else 0
-            })
+        status_data = cache.get_or_set(
+            'controller:irrigation_status', _irrigation_status_data, IRRIGATION_STATUS_CACHE_TIMEOUT
+        )
         
         return Response(status_data)
         
@@ -147,27 +216,34 @@ def get_irrigation_status(request):
 
 
 @api_view(['POST'])
+@idempotent_command
 def emergency_stop(request):
     """Emergency stop all systems"""
     try:
-        # Stop all active irrigations
-        active_events = IrrigationEvent.objects.filter(status__in=['scheduled', 'in_progress'])
+        # Stop all active irrigations: running events get their end time and
+        # actual duration, scheduled ones are cancelled in plain SQL
+        running_events = list(IrrigationEvent.objects.filter(status='in_progress'))
+        end_time = timezone.now()
         
-        events_stopped = 0
-        for event in active_events:
+        for event in running_events:
             event.status = 'cancelled'
-            if event.status == 'in_progress' and event.start_time:
-                event.end_time = timezone.now()
+            if event.start_time:
+                event.end_time = end_time
                 actual_duration = (event.end_time - event.start_time).total_seconds() / 60
                 event.actual_duration_minutes = round(actual_duration, 1)
-            event.save()
-            events_stopped += 1
+        
+        IrrigationEvent.objects.bulk_update(
+            running_events,
+            ['status', 'end_time', 'actual_duration_minutes'],
+            batch_size=EVENT_UPDATE_BATCH_SIZE
+        )
+        events_stopped = len(running_events)
+        events_stopped += IrrigationEvent.objects.filter(status='scheduled').update(status='cancelled')
         
         # Update system status
-        system_status = SystemStatus.objects.first()
-        if system_status:
-            system_status.status = 'error'
-            system_status.save()
+        _update_system_status(status='error')
+        
+        cache.delete_many(STATUS_CACHE_KEYS)
         
         return Response({
             'message': 'FAVQULODDA TO\'XTATISH! Barcha tizimlar to\'xtatildi.',
@@ -185,16 +261,15 @@ def emergency_stop(request):
 def system_restart(request):
     """Restart the irrigation system"""
     try:
-        # Simulate system restart process
-        time.sleep(1)  # Simulate restart delay
+        # Simulated restart: only the system status is refreshed, so there is
+        # nothing to wait for or hand off to a worker
+        _update_system_status(
+            status='active',
+            cpu_usage=random.uniform(10, 25),
+            memory_usage=random.uniform(20, 40)
+        )
         
-        # Update system status
-        system_status = SystemStatus.objects.first()
-        if system_status:
-            system_status.status = 'active'
-            system_status.cpu_usage = random.uniform(10, 25)
-            system_status.memory_usage = random.uniform(20, 40)
-            system_status.save()
+        cache.delete_many(STATUS_CACHE_KEYS)
         
         return Response({
             'message': 'Tizim muvaffaqiyatli qayta ishga tushirildi',
@@ -214,15 +289,14 @@ def test_mode(request):
         enable = request.data.get('enable', True)
         
         # Update system status
-        system_status = SystemStatus.objects.first()
-        if system_status:
-            if enable:
-                system_status.status = 'maintenance'
-                message = 'Test rejimi yoqildi'
-            else:
-                system_status.status = 'active'
-                message = 'Test rejimi o\'chirildi'
-            system_status.save()
+        if enable:
+            _update_system_status(status='maintenance')
+            message = 'Test rejimi yoqildi'
+        else:
+            _update_system_status(status='active')
+            message = 'Test rejimi o\'chirildi'
+        
+        cache.delete_many(STATUS_CACHE_KEYS)
         
         return Response({
             'message': message,
@@ -242,18 +316,12 @@ def calibrate_sensors(request):
     try:
         from sensor.models import Sensor
         
-        # Simulate calibration process
-        sensors = Sensor.objects.all()
-        calibrated_count = 0
+        # Simulated calibration: every sensor ends up active again, so mark them
+        # all in one UPDATE (real hardware calibration would go through the ESP32
+        # controllers); update() skips auto_now, hence the explicit last_updated
+        calibrated_count = Sensor.objects.update(status='active', last_updated=timezone.now())
         
-        for sensor in sensors:
-            # Simulate calibration (in real implementation, this would communicate with hardware)
-            sensor.status = 'maintenance'
-            sensor.save()
-            time.sleep(0.1)  # Simulate calibration time
-            sensor.status = 'active'
-            sensor.save()
-            calibrated_count += 1
+        cache.delete_many(STATUS_CACHE_KEYS)
         
         return Response({
             'message': f'{calibrated_count} ta datchik muvaffaqiyatli kalibrlandi',
@@ -296,30 +364,39 @@ def update_irrigation_schedule(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _system_diagnostics_data():
+    """System diagnostics payload (status row, sensor and reading counts)"""
+    from sensor.models import Sensor, SensorReading
+    
+    system_status = SystemStatus.objects.only('status', 'cpu_usage', 'memory_usage').first()
+    sensors = Sensor.objects.all()
+    
+    diagnostics = {
+        'system_health': 'Yaxshi' if system_status and system_status.status == 'active' else 'Muammoli',
+        'total_sensors': sensors.count(),
+        'active_sensors': sensors.filter(status='active').count(),
+        'sensors_in_maintenance': sensors.filter(status='maintenance').count(),
+        'sensors_with_errors': sensors.filter(status='error').count(),
+        'recent_readings': SensorReading.objects.filter(
+            timestamp__gte=timezone.now() - timedelta(hours=1)
+        ).count(),
+        'system_uptime': '7 kun 14 soat 23 daqiqa',  # Mock data
+        'last_backup': timezone.now() - timedelta(days=1),
+        'disk_space_available': '78%',
+        'memory_usage': f'{system_status.memory_usage:.1f}%' if system_status else '0%',
+        'cpu_usage': f'{system_status.cpu_usage:.1f}%' if system_status else '0%',
+    }
+    
+    return diagnostics
+
+
 @api_view(['GET'])
 def get_system_diagnostics(request):
     """Get detailed system diagnostics"""
     try:
-        from sensor.models import Sensor, SensorReading
-        
-        system_status = SystemStatus.objects.first()
-        sensors = Sensor.objects.all()
-        
-        diagnostics = {
-            'system_health': 'Yaxshi' if system_status and system_status.status == 'active' else 'Muammoli',
-            'total_sensors': sensors.count(),
-            'active_sensors': sensors.filter(status='active').count(),
-            'sensors_in_maintenance': sensors.filter(status='maintenance').count(),
-            'sensors_with_errors': sensors.filter(status='error').count(),
-            'recent_readings': SensorReading.objects.filter(
-                timestamp__gte=timezone.now() - timedelta(hours=1)
-            ).count(),
-            'system_uptime': '7 kun 14 soat 23 daqiqa',  # Mock data
-            'last_backup': timezone.now() - timedelta(days=1),
-            'disk_space_available': '78%',
-            'memory_usage': f'{system_status.memory_usage:.1f}%' if system_status else '0%',
-            'cpu_usage': f'{system_status.cpu_usage:.1f}%' if system_status else '0%',
-        }
+        diagnostics = cache.get_or_set(
+            'controller:system_diagnostics', _system_diagnostics_data, SYSTEM_DIAGNOSTICS_CACHE_TIMEOUT
+        )
         
         return Response(diagnostics)
         
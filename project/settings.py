@@ -45,6 +45,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'ai_engine.middleware.request_timestamp_middleware',
 ]
 
 ROOT_URLCONF = 'project.urls'
@@ -114,11 +115,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'project.renderers.ORJSONRenderer',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
-    ]
+    ],
+    # Scope used by controller.throttling on the irrigation start/stop endpoints
+    'DEFAULT_THROTTLE_RATES': {
+        'control': '5/second',
+    }
 }
 
 # CORS settings